@@ -1,12 +1,201 @@
 import fitz  # PyMuPDF
-import docx  # python-docx
-import easyocr
-import numpy as np
-import unicodedata
-import re
 import os
-from pdf2image import convert_from_path
-from underthesea import sent_tokenize
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr_readers import get_reader, has_reader, DEFAULT_LANGUAGES
+from ocr_batch import BatchedRecognizer
+from ocr_cache import OcrCache, DEFAULT_OCR_CACHE_BYTES
+from ocr_render import resolve_render, ocr_page_adaptive, image_pixmap, pixmap_array
+from ocr_zones import OCR_SCOPES, MAX_SIGNATURE_PROBES, render_zone, has_signature_block, sample_pages
+from text_cleaner import TextCleaner
+from sentence_segmenter import SEGMENTERS, split_sentences
+
+# easyocr (kéo theo torch), python-docx và underthesea được import khi dùng lần đầu:
+# file .txt/.docx và PDF có text layer không phải trả chi phí khởi động torch/EasyOCR.
+
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chạy độc lập (không có pipeline_metrics.py trên sys.path)
+    from contextlib import nullcontext as timed
+
+
+def _load_embedded(doc, xref):
+    try:
+        pix = image_pixmap(doc, xref)
+        return pixmap_array(pix), pix
+    except Exception:
+        # Ảnh MuPDF không chuyển được sang Gray/RGB: để EasyOCR tự decode
+        return doc.extract_image(xref)["image"], None
+
+
+def _render_native(page):
+    pix = page.get_pixmap(dpi=300)
+    return pixmap_array(pix), pix
+
+
+def _page_images(doc, page):
+    """
+    Ảnh cần OCR của một trang (chế độ native), dạng (tên bước đo, xref hoặc None, load).
+
+    load() trả về (ảnh, pixmap): ảnh là mảng NumPy trên bộ đệm của pixmap (không
+    encode PNG rồi để EasyOCR decode lại), nên phải giữ pixmap sống tới khi OCR xong.
+    Ảnh chỉ được decode/render khi thực sự cần (không cần nếu đã có trong cache).
+    """
+    image_list = page.get_images(full=True)
+
+    # If page has images, process them
+    if image_list:
+        for img_index, img in enumerate(image_list):
+            xref = img[0]
+            yield "ocr_image", xref, functools.partial(_load_embedded, doc, xref)
+    else:
+        # If no images found but text extraction failed earlier,
+        # maybe it's a full page image not detected as 'images' list?
+        # Render page to pixmap (image)
+        yield "ocr_page", None, functools.partial(_render_native, page)
+
+
+# Các khóa của image XObject quyết định cách decode stream thành điểm ảnh
+_IMAGE_META_KEYS = ("Width", "Height", "ColorSpace", "BitsPerComponent", "Decode", "Filter", "DecodeParms",
+                    "ImageMask")
+
+
+def _image_meta(doc, xref):
+    """Metadata của ảnh nhúng đưa vào khóa cache OCR, dạng "Width=100|Height=50|..."."""
+    parts = []
+    for name in _IMAGE_META_KEYS:
+        kind, value = doc.xref_get_key(xref, name)
+        if kind == "xref":
+            # Tham chiếu gián tiếp ("7 0 R"): số xref khác nhau giữa các tài liệu, lấy nội dung
+            value = doc.xref_object(int(value.split()[0]), compressed=True)
+        parts.append(f"{name}={value}")
+    return "|".join(parts)
+
+
+def _lookup(doc, xref, load, cache, seen):
+    """
+    Tìm text OCR đã có của một ảnh: trùng xref trong tài liệu (seen), rồi cache đĩa.
+
+    Returns:
+        tuple: (text hoặc None, khóa cache để ghi nếu phải OCR, (ảnh, pixmap) nếu đã load)
+    """
+    if seen is not None and xref is not None and xref in seen:
+        return seen[xref], None, None
+    if cache is None:
+        return None, None, None
+    loaded = None
+    if xref is not None:
+        # Dữ liệu thô của ảnh nhúng: hash được mà không cần decode. Cùng stream nén
+        # nhưng khác kích thước/hệ màu/Decode là ảnh khác, nên đưa cả các khóa đó vào
+        key = cache.key(doc.xref_stream_raw(xref), _image_meta(doc, xref))
+    else:
+        loaded = load()
+        key = cache.key(loaded[0])
+    text = cache.get(key)
+    if text is not None and seen is not None and xref is not None:
+        seen[xref] = text
+    return text, key, loaded
+
+
+def _ocr_page(doc, page_index, reader, render=None, cache=None, seen=None):
+    """
+    OCR một trang PDF, trả về danh sách đoạn text (mỗi ảnh nhúng một đoạn).
+
+    cache (OcrCache) và seen ({xref: text} của tài liệu đang đọc) giúp bỏ qua ảnh
+    đã OCR (chỉ áp dụng cho chế độ native).
+    """
+    page = doc[page_index]
+    if render:
+        # Chế độ render thích ứng: OCR cả trang đã render (xem ocr_render.py)
+        return [ocr_page_adaptive(page, reader, render)]
+    chunks = []
+    for step, xref, load in _page_images(doc, page):
+        text, key, loaded = _lookup(doc, xref, load, cache, seen)
+        if text is None:
+            image, pix = loaded or load()
+            with timed(step):
+                result = reader.readtext(image, detail=0, paragraph=True)
+            text = " ".join(result)
+            if key is not None:
+                cache.put(key, text)
+            if seen is not None and xref is not None:
+                seen[xref] = text
+        chunks.append(text)
+    return chunks
+
+
+def _ocr_zone(doc, page_index, zone, reader, cache=None):
+    """OCR một vùng của trang (xem ocr_zones.py), trả về text."""
+    load = functools.partial(render_zone, doc[page_index], zone)
+    text, key, loaded = _lookup(doc, None, load, cache, None)
+    if text is None:
+        image, pix = loaded or load()
+        with timed("ocr_zone"):
+            text = " ".join(reader.readtext(image, detail=0, paragraph=True))
+        if key is not None:
+            cache.put(key, text)
+    return text
+
+
+def _merge_page_text(text, chunks, method):
+    """
+    Ghép kết quả OCR vào text layer của trang, trả về (text, method).
+
+    Text layer ngắn nhưng không rỗng (trang số có ảnh con dấu/chữ ký) được giữ nguyên
+    và nối thêm kết quả OCR; chỉ trang không có text layer mới lấy hoàn toàn từ OCR.
+    """
+    ocr_text = "\n".join(chunks) + "\n"
+    if text.strip():
+        return (text + ocr_text, f"text+{method}") if any(c.strip() for c in chunks) else (text, "text")
+    return ocr_text, method
+
+
+# Trạng thái của mỗi tiến trình worker OCR song song (reader, cache, file PDF đang mở)
+_page_worker = {}
+
+
+def _init_page_worker(languages, gpu, torch_threads, cache_config=None):
+    # Giới hạn thread intra-op của torch để các worker không tranh nhau CPU
+    import torch
+    torch.set_num_threads(torch_threads)
+    _page_worker["reader"] = get_reader(languages, gpu)
+    _page_worker["cache"] = OcrCache(**cache_config) if cache_config else None
+
+
+def _ocr_page_in_worker(file_key, page_index, render=None):
+    # file_key = (đường dẫn, mtime): mở lại file nếu là tài liệu khác hoặc file đã đổi
+    if _page_worker.get("file_key") != file_key:
+        if _page_worker.get("doc") is not None:
+            _page_worker["doc"].close()
+        _page_worker["doc"] = fitz.open(file_key[0])
+        _page_worker["file_key"] = file_key
+        _page_worker["seen"] = {}
+    return _ocr_page(_page_worker["doc"], page_index, _page_worker["reader"], render,
+                     _page_worker["cache"], _page_worker["seen"])
+
+
+def _ocr_pool_context(use_gpu):
+    """
+    Cách tạo tiến trình cho pool OCR theo trang.
+
+    fork khi OCR chạy CPU và tiến trình chỉ có một thread: worker dùng chung reader đã
+    nạp ở tiến trình cha (copy-on-write). Nếu đang có thread khác (vd chế độ --staged:
+    pool được tạo từ thread OCR trong lúc thread NLP/LLM giữ lock của torch, spaCy,
+    HTTP client), fork có thể làm tiến trình con kẹt ở lock đó, nên dùng forkserver
+    (hoặc spawn); CUDA cũng không dùng lại được sau fork.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if not use_gpu and threading.active_count() == 1 and "fork" in methods:
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+# Dấu kết thúc câu (sau clean(), dấu câu đứng tách riêng)
+SENTENCE_ENDINGS = (".", "!", "?")
+
 
 class DocumentPreprocessor:
     """
@@ -28,32 +217,109 @@ class DocumentPreprocessor:
 
     
 
-    def __init__(self, use_gpu=False):
+    def __init__(self, use_gpu=False, ocr_languages=DEFAULT_LANGUAGES, ocr_workers=1,
+                 ocr_threads_per_worker=None, min_page_chars=100, ocr_render=None,
+                 ocr_batch_size=None, stream_pages=False, ocr_cache_dir=None,
+                 ocr_cache_bytes=DEFAULT_OCR_CACHE_BYTES, corrections_path=None,
+                 segmenter="underthesea", ocr_scope="full", ocr_sample_pages=0):
         self.raw_text = None
         self.cleaned_text = None
         self.sentences = []
 
-        # Map sửa lỗi OCR và typo
-        self.correction_map = {
-            'hanh phuc': 'hạnh phúc',
-            'đào tao': 'đào tạo',
-            'quyên hạn': 'quyền hạn',
-            'kể từngày': 'kể từ ngày',
-            'q4-bgdđt': 'qđ-bgdđt',
-            '1onăm': '10 năm',
-            'cuc hợp tác quốc tế': 'cục hợp tác quốc tế',
-            'fhứ trưởng': 'thứ trưởng',
-            'trung ưong': 'trung ương',
-            'số.2750': 'số 2750',
-        }
+        # Làm sạch + map sửa lỗi OCR và typo (ocr_corrections.json), biên dịch một lần
+        self.cleaner = TextCleaner(corrections_path)
+        self.correction_map = self.cleaner.corrections
 
-        print("Đang khởi tạo EasyOCR...")
-        try:
-            self.ocr_reader = easyocr.Reader(['vi', 'en'], gpu=use_gpu)
-            print("OCR sẵn sàng.")
-        except Exception as e:
-            print(f"Lỗi khi khởi tạo EasyOCR: {e}")
-            self.ocr_reader = None
+        # Tách câu: "underthesea" (sent_tokenize) hoặc "rules" (sentence_segmenter.py,
+        # theo cấu trúc văn bản hành chính, không cần underthesea)
+        if segmenter not in SEGMENTERS:
+            raise ValueError(f"Unknown segmenter: {segmenter} (choose from {', '.join(SEGMENTERS)})")
+        self.segmenter = segmenter
+        self._segment_warned = False
+
+        # EasyOCR reader chỉ được tạo khi thực sự cần OCR (xem ocr_reader),
+        # và được dùng chung giữa các processor trong tiến trình (ocr_readers.py)
+        self.use_gpu = use_gpu
+        self.ocr_languages = tuple(ocr_languages)
+        self._ocr_reader = None
+        self._ocr_init_failed = False
+
+        # OCR song song theo trang: ocr_workers > 1 dùng process pool, mỗi worker
+        # giới hạn ocr_threads_per_worker thread torch (mặc định chia đều số CPU)
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_threads_per_worker = ocr_threads_per_worker
+        self._ocr_pool = None
+
+        # PDF: trang có ít hơn min_page_chars ký tự text layer (và có ảnh) sẽ được OCR
+        self.min_page_chars = min_page_chars
+        self.page_report = []
+
+        # Render trang trước khi OCR: None/"native", "fast", "adaptive", "adaptive_bw"
+        # hoặc dict thiết lập riêng (xem ocr_render.py)
+        self.ocr_render = ocr_render
+        self._render_settings = resolve_render(ocr_render)
+
+        # ocr_batch_size: nhận dạng vùng chữ của nhiều trang theo batch (ocr_batch.py);
+        # None = readtext từng ảnh. Dùng cho chế độ native, một tiến trình
+        self.ocr_batch_size = ocr_batch_size
+
+        # ocr_scope="fields": PDF quét chỉ OCR vùng đầu trang 1 và khối chữ ký của trang
+        # nội dung cuối (ocr_zones.py), cộng ocr_sample_pages trang giữa; các trang khác
+        # bị bỏ qua. Pipeline OCR lại cả tài liệu nếu kết quả không qua kiểm tra Module 4.
+        # Chỉ áp dụng cho read(); iter_pages() luôn đọc mọi trang
+        if ocr_scope not in OCR_SCOPES:
+            raise ValueError(f"Unknown OCR scope: {ocr_scope} (choose from {', '.join(OCR_SCOPES)})")
+        self.ocr_scope = ocr_scope
+        self.ocr_sample_pages = ocr_sample_pages
+
+        # stream_pages: pipeline dùng iter_sentences() (đọc/làm sạch/tách câu từng trang)
+        # thay cho read().clean().segment() trên cả tài liệu
+        self.stream_pages = stream_pages
+
+        # Cache OCR theo ảnh (ocr_cache.py): None để tắt. Ảnh trùng xref trong một
+        # tài liệu luôn chỉ OCR một lần
+        self.ocr_cache = None
+        if ocr_cache_dir:
+            self.ocr_cache = OcrCache(ocr_cache_dir, ocr_cache_bytes,
+                                      namespace=f"{','.join(self.ocr_languages)}|{self.ocr_recognizer}")
+
+    @property
+    def ocr_recognizer(self):
+        """
+        Cách nhận dạng ảnh thực sự được dùng: "batchN" (BatchedRecognizer) hoặc "readtext".
+
+        ocr_batch_size chỉ có tác dụng ở chế độ native với một tiến trình (xem _ocr_pages);
+        batch N > 1 có thể cho kết quả khác readtext nên nằm trong khóa cache.
+        """
+        if self.ocr_batch_size and not self._render_settings and self.ocr_workers == 1:
+            return f"batch{self.ocr_batch_size}"
+        return "readtext"
+
+    @property
+    def ocr_reader(self):
+        """EasyOCR reader dùng chung, khởi tạo ở lần truy cập đầu tiên (None nếu lỗi)."""
+        if self._ocr_reader is None and not self._ocr_init_failed:
+            if not has_reader(self.ocr_languages, self.use_gpu):
+                print("Đang khởi tạo EasyOCR...")
+            try:
+                self._ocr_reader = get_reader(self.ocr_languages, self.use_gpu)
+                print("OCR sẵn sàng.")
+            except Exception as e:
+                print(f"Lỗi khi khởi tạo EasyOCR: {e}")
+                self._ocr_init_failed = True
+        return self._ocr_reader
+
+    def output_config(self):
+        """Các thiết lập ảnh hưởng tới văn bản đầu ra (dùng làm khóa cache Module 1)."""
+        return {"ocr_render": self._render_settings, "min_page_chars": self.min_page_chars,
+                "stream_pages": self.stream_pages, "corrections_version": self.cleaner.version,
+                "segmenter": self.segmenter, "ocr_scope": self.ocr_scope,
+                "ocr_languages": list(self.ocr_languages), "ocr_recognizer": self.ocr_recognizer,
+                "ocr_sample_pages": self.ocr_sample_pages if self.ocr_scope == "fields" else None}
+
+    def preload_ocr(self):
+        """Khởi tạo trước EasyOCR (dùng cho chế độ dịch vụ/batch muốn mô hình sẵn sàng)."""
+        return self.ocr_reader is not None
 
     # -------- Public API --------
     def read(self, file_path):
@@ -65,6 +331,7 @@ class DocumentPreprocessor:
         self.raw_text = None
         self.cleaned_text = None
         self.sentences = []
+        self.page_report = []
 
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
@@ -90,36 +357,123 @@ class DocumentPreprocessor:
             self.cleaned_text = ""
             return self
 
-        text = self.raw_text.lower()
-        text = self._handle_hard_line_breaks(text)
-        text = self._normalize_unicode(text)
-        text = self._remove_noise_and_special_chars(text)
-        text = self._apply_vietnamese_corrections(text)
-        text = self._normalize_whitespace(text)
-
-        self.cleaned_text = text
+        self.cleaned_text = self.clean_text(self.raw_text)
         return self
 
+    def clean_text(self, text):
+        """Làm sạch một đoạn văn bản (cả tài liệu hoặc một trang)."""
+        return self.cleaner.clean(text)
+
     def segment(self):
         if not self.cleaned_text:
             self.sentences = []
             return self
-        try:
-            self.sentences = sent_tokenize(self.cleaned_text)
-            self.sentences = [s.strip() for s in self.sentences if len(s.strip())>5]
-        except:
-            self.sentences = [self.cleaned_text]
+        self.sentences = [s.strip() for s in self._split_sentences(self.cleaned_text) if len(s.strip()) > 5]
         return self
 
+    # -------- Streaming API (tài liệu rất dài) --------
+    def iter_pages(self, file_path):
+        """
+        Đọc tài liệu từng trang một (generator): mỗi trang được đọc/OCR khi bên gọi
+        cần tới, và không giữ văn bản của cả tài liệu. File .txt/.docx là một trang.
+
+        Yields:
+            dict: {"page": số trang, "method": "text", "ocr", "text+ocr" hoặc "ocr_failed",
+                "text": văn bản thô}
+        """
+        self.page_report = []
+        if os.path.splitext(file_path)[1].lower() != ".pdf":
+            text = self.read(file_path).raw_text
+            self.raw_text = None
+            if text:
+                yield {"page": 1, "method": "text", "text": text}
+            return
+
+        doc = fitz.open(file_path)
+        seen = {}
+        try:
+            for page_index in range(len(doc)):
+                text = doc[page_index].get_text("text")
+                method = "text"
+                if self._page_needs_ocr(doc, page_index, text):
+                    if self.ocr_reader:
+                        chunks = _ocr_page(doc, page_index, self.ocr_reader, self._render_settings,
+                                           self.ocr_cache, seen)
+                        text, method = _merge_page_text(text, chunks, "ocr")
+                    else:
+                        method = "ocr_failed"
+                self.page_report.append({"page": page_index + 1, "method": method, "chars": len(text.strip())})
+                yield {"page": page_index + 1, "method": method, "text": text}
+        finally:
+            doc.close()
+
+    def iter_cleaned_pages(self, file_path):
+        """Như iter_pages nhưng "text" đã được làm sạch (bỏ qua trang rỗng)."""
+        for page in self.iter_pages(file_path):
+            text = self.clean_text(page["text"])
+            if text:
+                yield dict(page, text=text)
+
+    def iter_sentences(self, file_path):
+        """
+        Tách câu theo từng trang (generator). Câu chưa kết thúc ở cuối trang được
+        nối với trang sau trước khi tách.
+
+        Yields:
+            str: Câu đã làm sạch
+        """
+        carry = ""
+        for page in self.iter_cleaned_pages(file_path):
+            text = f"{carry} {page['text']}" if carry else page["text"]
+            sentences = self._split_sentences(text)
+            carry = ""
+            if sentences and not sentences[-1].rstrip().endswith(SENTENCE_ENDINGS):
+                carry = sentences.pop()
+            for sentence in sentences:
+                sentence = sentence.strip()
+                if len(sentence) > 5:
+                    yield sentence
+        if len(carry.strip()) > 5:
+            yield carry.strip()
+
+    def iter_official_lines(self, file_path):
+        """
+        Văn bản hành chính từng dòng (generator): mỗi câu của iter_sentences được định dạng
+        ngay khi tách xong, nên không cần giữ danh sách câu của cả tài liệu.
+
+        Yields:
+            str: Một dòng của get_official_text()
+        """
+        for sentence in self.iter_sentences(file_path):
+            yield self.cleaner.format_sentence(sentence)
+
+    def _split_sentences(self, text):
+        if self.segmenter == "rules":
+            return split_sentences(text)
+        try:
+            from underthesea import sent_tokenize
+            return sent_tokenize(text)
+        except Exception as e:
+            # Không gộp cả văn bản thành một câu: dùng tách câu theo quy tắc
+            if not self._segment_warned:
+                print(f"Lỗi khi tách câu bằng underthesea ({e}), dùng tách câu theo quy tắc.")
+                self._segment_warned = True
+            return split_sentences(text)
+
     def get_output(self):
         return {
             'raw_text': self.raw_text,
             'cleaned_text': self.cleaned_text,
-            'sentences': self.sentences
+            'sentences': self.sentences,
+            'page_report': self.page_report
         }
 
+    def get_official_text(self):
+        """Trả về văn bản hành chính đã định dạng (không ghi ra file)."""
+        return self._format_for_official_document(self.sentences)
+
     def save_as_official_txt(self, output_path):
-        formatted_text = self._format_for_official_document(self.sentences)
+        formatted_text = self.get_official_text()
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(formatted_text)
         print(f"✅ Văn bản hành chính đã được lưu tại: {output_path}")
@@ -131,6 +485,7 @@ class DocumentPreprocessor:
         return self
 
     def _read_docx(self, file_path):
+        import docx  # python-docx
         doc = docx.Document(file_path)
         self.raw_text = "\n".join([p.text for p in doc.paragraphs])
         return self
@@ -138,96 +493,211 @@ class DocumentPreprocessor:
     def _read_pdf(self, file_path):
         try:
             doc = fitz.open(file_path)
-            text = ""
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text("text")
-            if len(text.strip()) < 100:
-                return self._read_scanned_pdf(file_path)
-            self.raw_text = text
-            return self
+            page_texts = [doc.load_page(page_num).get_text("text") for page_num in range(len(doc))]
         except:
             return self._read_scanned_pdf(file_path)
 
-    def _read_scanned_pdf(self, file_path):
+        # Quyết định theo từng trang: trang có text layer dùng fitz, chỉ trang
+        # toàn ảnh (scan) mới OCR
+        ocr_pages = [page_index for page_index, text in enumerate(page_texts)
+                     if self._page_needs_ocr(doc, page_index, text)]
+
+        methods = {}
+        if self.ocr_scope == "fields" and ocr_pages:
+            ocr_results, methods = self._ocr_field_pages(file_path, doc, page_texts, ocr_pages)
+        else:
+            ocr_results = self._ocr_pages(file_path, doc, ocr_pages) if ocr_pages else {}
+
+        parts = []
+        self.page_report = []
+        skipped = failed = 0
+        ocr_set = set(ocr_pages)
+        for page_index, text in enumerate(page_texts):
+            if page_index in ocr_results:
+                text, method = _merge_page_text(text, ocr_results[page_index], methods.get(page_index, "ocr"))
+            elif page_index in ocr_set:
+                # Không OCR: chế độ fields bỏ qua trang giữa/phụ lục, hoặc EasyOCR không
+                # khởi tạo được. Text layer ngắn (nếu có) vẫn được giữ
+                if self.ocr_reader is None:
+                    method = "ocr_failed"
+                    failed += 1
+                else:
+                    method = "skipped"
+                    skipped += 1
+                text = text if text.strip() else ""
+            else:
+                method = "text"
+            parts.append(text)
+            self.page_report.append({"page": page_index + 1, "method": method, "chars": len(text.strip())})
+        self.raw_text = "".join(parts)
+
+        if ocr_pages:
+            summary = (f"PDF: {len(page_texts) - len(ocr_pages)} trang text layer, "
+                       f"{len(ocr_pages) - skipped - failed} trang OCR")
+            if skipped:
+                summary += f", {skipped} trang bỏ qua"
+            if failed:
+                summary += f", {failed} trang OCR lỗi"
+            print(summary)
+        return self
+
+    def _ocr_field_pages(self, file_path, doc, page_texts, ocr_pages):
+        """
+        OCR chế độ fields: vùng đầu trang 1, vùng chữ ký của trang nội dung cuối và
+        ocr_sample_pages trang giữa (cả trang). Trang có text layer không cần OCR.
+
+        Returns:
+            tuple: ({page_index: [đoạn text]}, {page_index: phương pháp cho page_report})
+        """
         if not self.ocr_reader:
-            self.raw_text = ""
-            return self
-        
-        # Use fitz (PyMuPDF) to extract images instead of pdf2image (requires poppler)
+            return {}, {}
+        reader = self.ocr_reader
+        ocr_set = set(ocr_pages)
+        last_page = len(page_texts) - 1
+        results, methods = {}, {}
+
+        # Trang nội dung cuối: dò từ cuối lên (kể cả trang 1), trang đầu tiên có khối
+        # chữ ký (các trang sau nó là phụ lục). Không tìm thấy thì lấy trang cuối
+        last_body_page, probes = last_page, {}
+        for page_index in range(last_page, -1, -1) if last_page > 0 else ():
+            if page_index in ocr_set:
+                if len(probes) >= MAX_SIGNATURE_PROBES:
+                    break
+                probes[page_index] = _ocr_zone(doc, page_index, "signature", reader, self.ocr_cache)
+                text = probes[page_index]
+            else:
+                text = page_texts[page_index]
+            if has_signature_block(text):
+                last_body_page = page_index
+                break
+        if last_body_page in probes and last_body_page > 0:
+            results[last_body_page] = [probes[last_body_page]]
+            methods[last_body_page] = "ocr_zone:signature"
+
+        if 0 in ocr_set:
+            # Trang 1 cũng là trang nội dung cuối (tài liệu một trang, hoặc chỉ có phụ lục
+            # phía sau): khối chữ ký nằm ở trang 1, OCR cả trang
+            zone = "page" if last_body_page == 0 else "header"
+            results[0] = [_ocr_zone(doc, 0, zone, reader, self.ocr_cache)]
+            methods[0] = f"ocr_zone:{zone}"
+
+        sampled = [page_index for page_index in sample_pages(last_body_page, self.ocr_sample_pages)
+                   if page_index in ocr_set]
+        if sampled:
+            results.update(self._ocr_pages(file_path, doc, sampled))
+        return results, methods
+
+    def _page_needs_ocr(self, doc, page_index, text):
+        """Trang không có text layer dùng được (toàn ảnh/scan) thì phải OCR."""
+        stripped = text.strip()
+        if len(stripped) >= self.min_page_chars:
+            return False
+        if stripped and not doc[page_index].get_images(full=True):
+            # Trang ngắn nhưng là text thật (vd trang chỉ có "Nơi nhận")
+            return False
+        return True
+
+    def _read_scanned_pdf(self, file_path):
+        """OCR toàn bộ các trang (dùng khi fitz không đọc được text layer)."""
         try:
             doc = fitz.open(file_path)
-            full_text = []
-            
-            for page_index in range(len(doc)):
-                page = doc[page_index]
-                image_list = page.get_images(full=True)
-                
-                # If page has images, process them
-                if image_list:
-                    for img_index, img in enumerate(image_list):
-                        xref = img[0]
-                        base_image = doc.extract_image(xref)
-                        image_bytes = base_image["image"]
-                        
-                        # Convert bytes to numpy array for EasyOCR
-                        # EasyOCR can read from bytes directly or we can convert to PIL/numpy
-                        # But EasyOCR readtext accepts bytes
-                        result = self.ocr_reader.readtext(image_bytes, detail=0, paragraph=True)
-                        full_text.append(" ".join(result))
-                else:
-                    # If no images found but text extraction failed earlier, 
-                    # maybe it's a full page image not detected as 'images' list?
-                    # Render page to pixmap (image)
-                    pix = page.get_pixmap(dpi=300)
-                    # Convert pixmap to bytes
-                    img_bytes = pix.tobytes("png")
-                    result = self.ocr_reader.readtext(img_bytes, detail=0, paragraph=True)
-                    full_text.append(" ".join(result))
-                    
+            ocr_results = self._ocr_pages(file_path, doc, range(len(doc)))
+            full_text = [chunk for page_index in sorted(ocr_results) for chunk in ocr_results[page_index]]
             self.raw_text = "\n".join(full_text)
+            self.page_report = [{"page": page_index + 1, "method": "ocr",
+                                 "chars": len("\n".join(ocr_results[page_index]).strip())}
+                                for page_index in sorted(ocr_results)]
+            if self.ocr_reader is None:
+                self.page_report = [{"page": page_index + 1, "method": "ocr_failed", "chars": 0}
+                                    for page_index in range(len(doc))]
+                print(f"PDF: {len(doc)} trang OCR lỗi (không khởi tạo được EasyOCR)")
         except Exception as e:
             print(f"Lỗi khi OCR PDF bằng fitz: {e}")
             self.raw_text = ""
             
         return self
 
-    def _handle_hard_line_breaks(self, text):
-        text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
-        text = re.sub(r'[\n\r\t]', ' ', text)
-        return text
+    def _ocr_pages(self, file_path, doc, page_indices):
+        """
+        OCR các trang chỉ định.
+
+        Returns:
+            dict: {page_index: [đoạn text]} (rỗng nếu không khởi tạo được EasyOCR)
+        """
+        if not self.ocr_reader:
+            return {}
+        page_indices = list(page_indices)
+        # Use fitz (PyMuPDF) to extract images instead of pdf2image (requires poppler)
+        if self.ocr_recognizer != "readtext":
+            return self._ocr_pages_batched(doc, page_indices)
+        if self.ocr_workers > 1:
+            # OCR song song theo trang, ghép lại theo đúng thứ tự trang
+            file_key = (file_path, os.path.getmtime(file_path))
+            with timed("ocr_parallel"):
+                pool = self._get_ocr_pool()
+                pages = list(pool.map(_ocr_page_in_worker, [file_key] * len(page_indices), page_indices,
+                                      [self._render_settings] * len(page_indices)))
+        else:
+            seen = {}
+            pages = [_ocr_page(doc, page_index, self.ocr_reader, self._render_settings, self.ocr_cache, seen)
+                     for page_index in page_indices]
+        return dict(zip(page_indices, pages))
+
+    def _ocr_pages_batched(self, doc, page_indices):
+        """OCR các trang bằng BatchedRecognizer: nhận dạng vùng chữ của nhiều trang theo batch."""
+        seen = {}
+        pages = {page_index: [] for page_index in page_indices}
+        pending = []  # (trang, vị trí trong trang, xref, khóa cache) của ảnh đưa đi nhận dạng
+        waiting = {}  # xref đang chờ nhận dạng -> các vị trí khác dùng cùng ảnh
 
-    def _normalize_unicode(self, text):
-        return unicodedata.normalize('NFC', text)
+        def images():
+            for page_index in page_indices:
+                for _, xref, load in _page_images(doc, doc[page_index]):
+                    slot = len(pages[page_index])
+                    if xref is not None and xref in waiting:
+                        waiting[xref].append((page_index, slot))
+                        pages[page_index].append(None)
+                        continue
+                    text, key, loaded = _lookup(doc, xref, load, self.ocr_cache, seen)
+                    pages[page_index].append(text)
+                    if text is not None:
+                        continue
+                    if xref is not None:
+                        waiting[xref] = []
+                    pending.append((page_index, slot, xref, key))
+                    image, pix = loaded or load()
+                    yield image
 
-    def _remove_noise_and_special_chars(self, text):
-        text = re.sub(r'([.,!?;:()])', r' \1 ', text)
-        text = re.sub(r'[^\w\s.,!?;:()-]+', ' ', text, flags=re.UNICODE)
-        text = text.replace('_',' ')
-        return text
+        with timed("ocr_batched"):
+            texts = BatchedRecognizer(self.ocr_reader, self.ocr_batch_size).readtext(images())
+        for (page_index, slot, xref, key), result in zip(pending, texts):
+            text = " ".join(result)
+            pages[page_index][slot] = text
+            for other_page, other_slot in waiting.get(xref, []):
+                pages[other_page][other_slot] = text
+            if key is not None:
+                self.ocr_cache.put(key, text)
+        return pages
 
-    def _normalize_whitespace(self, text):
-        return " ".join(text.split()).strip()
+    def _get_ocr_pool(self):
+        """Process pool OCR theo trang, tạo một lần và dùng lại cho các tài liệu sau."""
+        if self._ocr_pool is None:
+            threads = self.ocr_threads_per_worker or max(1, (os.cpu_count() or 1) // self.ocr_workers)
+            self._ocr_pool = ProcessPoolExecutor(
+                max_workers=self.ocr_workers, mp_context=_ocr_pool_context(self.use_gpu),
+                initializer=_init_page_worker,
+                initargs=(self.ocr_languages, self.use_gpu, threads,
+                          self.ocr_cache.config() if self.ocr_cache else None))
+        return self._ocr_pool
 
-    def _apply_vietnamese_corrections(self, text):
-        for old, new in self.correction_map.items():
-            text = re.sub(r'\b'+re.escape(old)+r'\b', new, text)
-        text = re.sub(r'(độc lập) \d+ (tự do) \d+ (hạnh phúc)', r'\1 \2 \3', text)
-        return text
+    def close(self):
+        """Dừng process pool OCR song song (nếu có)."""
+        if self._ocr_pool is not None:
+            self._ocr_pool.shutdown()
+            self._ocr_pool = None
 
     def _format_for_official_document(self, sentences):
-        lines = []
-        for s in sentences:
-            s = s.replace("kt", "ký thay")
-            s = s.replace("y nơi nhân", "nơi nhận")
-            s = s.replace("đào tao", "đào tạo")
-            s = s.replace("dào tao", "đào tạo")
-            s = s.replace("quyết định", "QUYẾT ĐỊNH")
-            s = re.sub(r"bộ giáo dục và đào tạo cộng hòa xã hội chủ nghĩa việt nam độc lập\s+2\s+tự do\s+5\s+hanh phúc", "BỘ GIÁO DỤC VÀ ĐÀO TẠO\n CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM\n Độc lập - Tự do - Hạnh phúc", s, flags=re.IGNORECASE)
-            s = re.sub(r'\s*([.,;:()])\s*', r' \1 ', s)
-            s = " ".join(s.split())
-            lines.append(s)
-        return "\n".join(lines)
+        return "\n".join(self.cleaner.format_sentence(s) for s in sentences)
 
 
 # -------- Chạy ví dụ --------
@@ -0,0 +1,91 @@
+"""
+Nhận dạng EasyOCR theo batch cho nhiều trang/ảnh.
+
+readtext() của EasyOCR chạy detection rồi nhận dạng từng vùng chữ một (trên CPU
+mỗi vùng là một lần forward). BatchedRecognizer vẫn detect từng ảnh, nhưng gom
+các vùng chữ của nhiều ảnh lại và nhận dạng theo batch. Các vùng được nhóm theo
+chiều rộng sau khi resize (imgW), giống hệt chiều rộng readtext dùng khi nhận
+dạng từng vùng, nên phần padding không đổi và kết quả tương đương
+readtext(detail=0, paragraph=True).
+"""
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chạy độc lập (không có pipeline_metrics.py trên sys.path)
+    from contextlib import nullcontext as timed
+
+DEFAULT_BATCH_SIZE = 32
+
+
+class BatchedRecognizer:
+    """
+    Detect từng ảnh, nhận dạng vùng chữ của nhiều ảnh theo batch.
+    """
+
+    def __init__(self, reader, batch_size=DEFAULT_BATCH_SIZE, max_pending=None):
+        """
+        Args:
+            reader (easyocr.Reader): Reader đã khởi tạo
+            batch_size (int): Số vùng chữ mỗi batch nhận dạng
+            max_pending (int, optional): Số vùng chữ tối đa giữ trong bộ nhớ trước khi
+                nhận dạng (mặc định 32 batch), giới hạn RAM với tài liệu rất dài
+        """
+        import easyocr.easyocr as easyocr_core
+
+        self.reader = reader
+        self.batch_size = max(1, batch_size)
+        self.max_pending = max_pending or self.batch_size * 32
+        self.img_h = easyocr_core.imgH
+        self.ignore_char = "".join(set(reader.character) - set(reader.lang_char))
+
+    def readtext(self, images):
+        """
+        OCR nhiều ảnh.
+
+        Args:
+            images (iterable): Ảnh (mảng NumPy hoặc bytes). Mỗi ảnh chỉ được dùng trong
+                lúc detect, nên có thể truyền generator giữ pixmap sống từng ảnh một
+
+        Returns:
+            list: Với mỗi ảnh, danh sách đoạn văn (như readtext(detail=0, paragraph=True))
+        """
+        from easyocr.utils import reformat_input, get_image_list, get_paragraph
+
+        results = []
+        pending = {}  # imgW -> [(ảnh, thứ tự vùng, (box, crop))]
+        pending_count = 0
+        for image_index, image in enumerate(images):
+            results.append([])
+            img, img_cv_grey = reformat_input(image)
+            with timed("ocr_detect"):
+                horizontal_list, free_list = self.reader.detect(img, reformat=False)
+
+            # Cắt từng vùng như Reader.recognize (chế độ từng vùng): cùng crop, cùng imgW
+            boxes = [([box], []) for box in horizontal_list[0]] + [([], [box]) for box in free_list[0]]
+            for order, (h_list, f_list) in enumerate(boxes):
+                crops, max_width = get_image_list(h_list, f_list, img_cv_grey, model_height=self.img_h)
+                for crop in crops:
+                    pending.setdefault(int(max_width), []).append((image_index, order, crop))
+                    pending_count += 1
+
+            if pending_count >= self.max_pending:
+                self._recognize(pending, results)
+                pending, pending_count = {}, 0
+        self._recognize(pending, results)
+
+        paragraphs = []
+        for items in results:
+            items.sort(key=lambda item: item[0])
+            paragraphs.append([p[1] for p in get_paragraph([item[1] for item in items], x_ths=1.0, y_ths=0.5)])
+        return paragraphs
+
+    def _recognize(self, pending, results):
+        from easyocr.recognition import get_text
+
+        reader = self.reader
+        for img_w, items in pending.items():
+            with timed("ocr_recognize_batch"):
+                predictions = get_text(reader.character, self.img_h, img_w, reader.recognizer, reader.converter,
+                                       [item[2] for item in items], self.ignore_char, "greedy", 5,
+                                       self.batch_size, 0.1, 0.5, 0.003, 0, reader.device)
+            for (image_index, order, _), prediction in zip(items, predictions):
+                results[image_index].append((order, prediction))
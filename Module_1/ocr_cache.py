@@ -0,0 +1,123 @@
+"""
+Cache kết quả OCR theo từng ảnh, trên đĩa.
+
+Khóa = SHA-256(namespace + nội dung ảnh):
+- ảnh nhúng: dữ liệu thô (chưa decode) của xref cùng metadata của ảnh (Width, Height,
+  ColorSpace, BitsPerComponent, Decode...), nên con dấu/logo/trang scan giống nhau
+  giữa các tài liệu hoặc giữa các lần chạy lại chỉ OCR một lần
+- trang render: điểm ảnh của pixmap
+namespace gồm phiên bản cache, ngôn ngữ và cách OCR, nên đổi cấu hình OCR không
+dùng nhầm kết quả cũ. Trong cùng một tài liệu, ảnh trùng xref còn được bỏ qua
+trước cả bước hash (xem module1._ocr_page).
+Dung lượng bị giới hạn, mục ít dùng nhất (LRU theo mtime) bị xóa trước.
+"""
+import os
+import json
+import hashlib
+import tempfile
+
+# Tăng khi đổi cách OCR một ảnh làm kết quả cũ không còn đúng
+OCR_CACHE_VERSION = 3
+
+DEFAULT_OCR_CACHE_DIR = os.path.join(".cache", "ocr")
+DEFAULT_OCR_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class OcrCache:
+    """
+    Cache text OCR của từng ảnh, giới hạn dung lượng với LRU.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_OCR_CACHE_DIR, max_bytes=DEFAULT_OCR_CACHE_BYTES, namespace=""):
+        """
+        Args:
+            cache_dir (str): Thư mục lưu cache
+            max_bytes (int): Dung lượng tối đa; vượt quá thì xóa mục cũ nhất
+            namespace (str): Cấu hình OCR (ngôn ngữ, chế độ) đưa vào khóa
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.namespace = f"v{OCR_CACHE_VERSION}|{namespace}"
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total = self._scan()[1]
+
+    def config(self):
+        """Tham số để tạo lại cache trong tiến trình khác (worker OCR song song)."""
+        return {"cache_dir": self.cache_dir, "max_bytes": self.max_bytes,
+                "namespace": self.namespace.split("|", 1)[1]}
+
+    def key(self, data, meta=""):
+        """
+        Khóa của một ảnh từ bytes/memoryview/mảng NumPy liên tục.
+
+        meta (str): Thông tin cần để decode data (metadata ảnh nhúng), hash cùng data
+        """
+        h = hashlib.sha256(self.namespace.encode("utf-8"))
+        h.update(meta.encode("utf-8"))
+        h.update(b"\0")
+        h.update(data)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Lấy text đã OCR, trả về None nếu không có."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = json.load(f)["text"]
+            # Cập nhật mtime để đánh dấu vừa được dùng (LRU)
+            os.utime(path, None)
+            self.hits += 1
+            return text
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        """Ghi kết quả (file tạm rồi rename để an toàn khi nhiều tiến trình)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"text": text}, f, ensure_ascii=False)
+            self._total += os.path.getsize(tmp_path)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Chỉ quét thư mục khi ước lượng vượt giới hạn (có thể có hàng nghìn ảnh)
+        if self._total > self.max_bytes:
+            self._evict()
+
+    def _scan(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+        return entries, total
+
+    def _evict(self):
+        entries, total = self._scan()
+        entries.sort()
+        # Xóa xuống 90% giới hạn để không phải quét lại sau mỗi lần ghi
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
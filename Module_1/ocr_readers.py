@@ -0,0 +1,63 @@
+"""
+Registry EasyOCR reader dùng chung trong tiến trình, theo danh sách ngôn ngữ.
+
+Mỗi easyocr.Reader nạp mạng detection + recognition (hàng trăm MB), nên mọi
+DocumentPreprocessor trong cùng tiến trình dùng chung một reader cho mỗi bộ
+(ngôn ngữ, gpu). Ở chế độ nhiều tiến trình, gọi preload_reader() trước khi fork
+để các worker thừa hưởng trọng số mô hình (copy-on-write) thay vì tự nạp bản riêng.
+"""
+import threading
+
+DEFAULT_LANGUAGES = ('vi', 'en')
+
+_readers = {}
+_lock = threading.Lock()
+
+
+def _key(languages, gpu):
+    return (tuple(languages), bool(gpu))
+
+
+def get_reader(languages=DEFAULT_LANGUAGES, gpu=False):
+    """
+    Lấy EasyOCR reader cho bộ ngôn ngữ, tạo mới ở lần gọi đầu tiên.
+
+    Args:
+        languages (iterable): Danh sách mã ngôn ngữ, vd ('vi', 'en')
+        gpu (bool): Dùng GPU
+
+    Returns:
+        easyocr.Reader
+
+    Raises:
+        Exception: Lỗi import/khởi tạo EasyOCR (để bên gọi quyết định cách xử lý)
+    """
+    key = _key(languages, gpu)
+    reader = _readers.get(key)
+    if reader is not None:
+        return reader
+    with _lock:
+        if key not in _readers:
+            import easyocr
+            _readers[key] = easyocr.Reader(list(languages), gpu=gpu)
+        return _readers[key]
+
+
+def preload_reader(languages=DEFAULT_LANGUAGES, gpu=False):
+    """Nạp trước reader (vd trong tiến trình cha trước khi fork worker). Trả về True nếu thành công."""
+    try:
+        get_reader(languages, gpu)
+        return True
+    except Exception as e:
+        print(f"Lỗi khi khởi tạo EasyOCR: {e}")
+        return False
+
+
+def has_reader(languages=DEFAULT_LANGUAGES, gpu=False):
+    return _key(languages, gpu) in _readers
+
+
+def clear_readers():
+    """Giải phóng tất cả reader đã nạp."""
+    with _lock:
+        _readers.clear()
@@ -0,0 +1,148 @@
+"""
+Render trang PDF thích ứng trước khi OCR.
+
+Mặc định ("native") Module 1 OCR ảnh nhúng gốc của trang, hoặc render cả trang ở
+300 dpi màu. Các chế độ thích ứng render cả trang ở DPI thấp, thang xám (có thể
+nhị phân hóa), rồi chỉ render lại ở DPI cao những vùng EasyOCR đọc với độ tin cậy
+thấp. Đánh đổi tốc độ / độ chính xác của từng chế độ: benchmarks/ocr_render_bench.py.
+"""
+import fitz  # PyMuPDF
+
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chạy độc lập (không có pipeline_metrics.py trên sys.path)
+    from contextlib import nullcontext as timed
+
+# dpi: DPI render lần đầu; max_side: giới hạn cạnh dài ảnh (px), hạ DPI nếu trang lớn;
+# binarize: ngưỡng 0-255 để nhị phân hóa (None = giữ thang xám);
+# refine_dpi / refine_below: render lại ở refine_dpi các vùng có độ tin cậy < refine_below
+RENDER_PRESETS = {
+    "native": None,
+    "fast": {"dpi": 150, "grayscale": True, "max_side": 2000, "binarize": None,
+             "refine_dpi": None, "refine_below": 0.0},
+    "adaptive": {"dpi": 150, "grayscale": True, "max_side": 2000, "binarize": None,
+                 "refine_dpi": 300, "refine_below": 0.5},
+    "adaptive_bw": {"dpi": 150, "grayscale": True, "max_side": 2000, "binarize": 160,
+                    "refine_dpi": 300, "refine_below": 0.5},
+}
+
+# Lề (point) thêm quanh vùng được render lại, tránh cắt mất dấu tiếng Việt
+REFINE_MARGIN = 4
+
+
+def resolve_render(render):
+    """
+    Chuẩn hóa tham số ocr_render.
+
+    Args:
+        render (None, str hoặc dict): Tên preset, hoặc dict ghi đè lên preset "adaptive"
+
+    Returns:
+        dict hoặc None: Thiết lập render (None = chế độ native)
+    """
+    if render is None:
+        return None
+    if isinstance(render, str):
+        if render not in RENDER_PRESETS:
+            raise ValueError(f"Unknown OCR render mode: {render} (choose from {', '.join(RENDER_PRESETS)})")
+        preset = RENDER_PRESETS[render]
+        return dict(preset) if preset else None
+    settings = dict(RENDER_PRESETS["adaptive"])
+    settings.update(render)
+    return settings
+
+
+def pixmap_array(pix):
+    """
+    Mảng NumPy nằm trực tiếp trên bộ đệm samples của pixmap: không copy, không
+    encode/decode PNG. Mảng chỉ hợp lệ khi pix còn sống, nên bên gọi phải giữ tham
+    chiếu tới pix cho tới khi OCR xong.
+
+    Returns:
+        numpy.ndarray: (h, w) với ảnh xám, (h, w, n) với ảnh màu
+    """
+    import numpy as np
+
+    # Mỗi dòng của samples dài pix.stride byte
+    image = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.stride)
+    image = image[:, :pix.width * pix.n]
+    if pix.n > 1:
+        image = image.reshape(pix.height, pix.width, pix.n)
+    if not image.flags.c_contiguous:
+        # Chỉ xảy ra khi dòng có byte đệm; OpenCV (trong EasyOCR) cần mảng liên tục
+        image = np.ascontiguousarray(image)
+    return image
+
+
+def image_pixmap(doc, xref):
+    """Giải mã ảnh nhúng thành pixmap Gray/RGB không có kênh alpha."""
+    pix = fitz.Pixmap(doc, xref)
+    if pix.alpha:
+        pix = fitz.Pixmap(pix, 0)
+    if pix.n not in (1, 3):
+        # CMYK, ảnh có bảng màu... -> RGB
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    return pix
+
+
+def render_page(page, dpi, settings, clip=None):
+    """
+    Render trang (hoặc vùng clip) theo thiết lập.
+
+    Returns:
+        tuple: (pixmap, DPI thực tế đã dùng)
+    """
+    rect = clip or page.rect
+    max_side = settings.get("max_side")
+    if max_side:
+        dpi = min(dpi, max_side * 72.0 / max(rect.width, rect.height))
+    colorspace = fitz.csGRAY if settings.get("grayscale", True) else fitz.csRGB
+    return page.get_pixmap(dpi=dpi, colorspace=colorspace, clip=clip, alpha=False), dpi
+
+
+def prepare_image(pix, settings):
+    """Mảng đưa vào EasyOCR (nhị phân hóa nếu được yêu cầu). Giữ pix sống khi dùng mảng."""
+    image = pixmap_array(pix)
+    threshold = settings.get("binarize")
+    if threshold is not None:
+        import numpy as np
+        image = np.where(image > threshold, 255, 0).astype(np.uint8)
+    return image
+
+
+def ocr_page_adaptive(page, reader, settings):
+    """OCR cả trang theo thiết lập render, trả về text của trang."""
+    pix, dpi = render_page(page, settings["dpi"], settings)
+    image = prepare_image(pix, settings)
+    with timed("ocr_page"):
+        results = reader.readtext(image, detail=1, paragraph=False)
+
+    texts = []
+    for bbox, text, confidence in results:
+        if settings.get("refine_dpi") and confidence < settings.get("refine_below", 0.0):
+            with timed("ocr_refine"):
+                text = _refine_region(page, reader, bbox, dpi, confidence, settings) or text
+        texts.append(text)
+    return " ".join(texts)
+
+
+def _refine_region(page, reader, bbox, dpi, confidence, settings):
+    """Render lại một vùng ở refine_dpi; trả về text mới nếu tin cậy hơn, ngược lại None."""
+    scale = 72.0 / dpi
+    xs = [point[0] for point in bbox]
+    ys = [point[1] for point in bbox]
+    clip = fitz.Rect(min(xs) * scale - REFINE_MARGIN, min(ys) * scale - REFINE_MARGIN,
+                     max(xs) * scale + REFINE_MARGIN, max(ys) * scale + REFINE_MARGIN)
+    clip = (clip + (page.rect.x0, page.rect.y0, page.rect.x0, page.rect.y0)) & page.rect
+    if clip.is_empty:
+        return None
+
+    settings = dict(settings, max_side=None)
+    pix, _ = render_page(page, settings["refine_dpi"], settings, clip=clip)
+    results = reader.readtext(prepare_image(pix, settings), detail=1, paragraph=False)
+    if not results:
+        return None
+    refined_confidence = sum(r[2] for r in results) / len(results)
+    if refined_confidence <= confidence:
+        return None
+    return " ".join(r[1] for r in results)
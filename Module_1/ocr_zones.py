@@ -0,0 +1,74 @@
+"""
+OCR theo vùng cho chế độ chỉ trích xuất trường (ocr_scope="fields").
+
+Các trường Module 3 trích xuất (số hiệu, ngày ban hành, cơ quan, trích yếu, người ký,
+chức danh, nơi nhận) nằm ở phần đầu trang 1 và khối chữ ký / nơi nhận của trang nội
+dung cuối cùng. Chế độ này chỉ OCR hai vùng đó (render 300 dpi), bỏ qua các trang
+giữa (hoặc OCR một vài trang mẫu), thay vì OCR mọi trang kể cả phụ lục dài.
+
+Trang nội dung cuối được tìm từ cuối tài liệu lên: trang đầu tiên có dấu hiệu khối
+chữ ký ("nơi nhận", "kt.", "tm."...) trong vùng chữ ký. Các trang phụ lục
+phía sau bị bỏ qua.
+"""
+import unicodedata
+
+import fitz  # PyMuPDF
+
+from ocr_render import pixmap_array
+
+OCR_SCOPES = ("full", "fields")
+
+# (mép trên, mép dưới) theo tỉ lệ chiều cao trang
+ZONES = {
+    "header": (0.0, 0.45),
+    "signature": (0.4, 1.0),
+    "page": (0.0, 1.0),
+}
+
+ZONE_DPI = 300
+
+# Số trang tối đa dò từ cuối tài liệu lên để tìm khối chữ ký
+MAX_SIGNATURE_PROBES = 4
+
+# Chỉ dùng dấu hiệu riêng của khối chữ ký: chức danh ("bộ trưởng"...) còn xuất hiện
+# trong phần căn cứ và nội dung
+SIGNATURE_MARKERS = ("nơi nhận", "nơi nhân", "kt.", "ký thay", "tm.")
+
+
+def zone_rect(page, zone):
+    """Vùng của trang theo tên trong ZONES."""
+    top, bottom = ZONES[zone]
+    rect = page.rect
+    return fitz.Rect(rect.x0, rect.y0 + rect.height * top, rect.x1, rect.y0 + rect.height * bottom)
+
+
+def render_zone(page, zone, dpi=ZONE_DPI):
+    """Render một vùng của trang. Trả về (ảnh NumPy, pixmap); giữ pixmap sống khi dùng ảnh."""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, clip=zone_rect(page, zone), alpha=False)
+    return pixmap_array(pix), pix
+
+
+def has_signature_block(text):
+    """Text OCR có dấu hiệu khối chữ ký / nơi nhận hay không."""
+    text = unicodedata.normalize("NFC", text).lower()
+    return any(marker in text for marker in SIGNATURE_MARKERS)
+
+
+def sample_pages(last_body_page, count):
+    """
+    Các trang giữa (sau trang 1, trước trang nội dung cuối) được OCR cả trang để lấy mẫu.
+
+    Args:
+        last_body_page (int): Chỉ số trang nội dung cuối
+        count (int): Số trang mẫu, cách đều nhau (0 = bỏ qua mọi trang giữa)
+
+    Returns:
+        list: Chỉ số các trang mẫu
+    """
+    middle = list(range(1, last_body_page))
+    if count <= 0 or not middle:
+        return []
+    if count >= len(middle):
+        return middle
+    step = len(middle) / count
+    return sorted({middle[int(i * step + step / 2)] for i in range(count)})
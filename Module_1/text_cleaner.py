@@ -0,0 +1,132 @@
+"""
+Làm sạch văn bản Module 1 bằng các regex biên dịch sẵn.
+
+Mọi pattern được biên dịch một lần khi tạo TextCleaner. Bảng sửa lỗi OCR
+(ocr_corrections.json) được gom thành một regex alternation, nên cả bảng chỉ cần
+một lượt quét văn bản, thay cho một re.sub trên toàn văn bản cho mỗi mục. Các bước
+thay ký tự đơn (xuống dòng, tab, "_") gộp vào một lần str.translate.
+
+Một lượt quét cho kết quả giống hệt việc thay lần lượt từng mục, miễn là không khóa
+nào nằm trong (hoặc nối tiếp được với) khóa khác hay giá trị thay thế; nếu không, thứ
+tự thay sẽ ảnh hưởng tới kết quả. TextCleaner kiểm tra điều này khi nạp bảng. So sánh với cách
+làm cũ: benchmarks/text_clean_bench.py.
+"""
+import os
+import re
+import json
+import unicodedata
+
+DEFAULT_CORRECTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_corrections.json")
+
+# Từ bị ngắt dòng bằng dấu gạch nối: "quy-\nđịnh" -> "quyđịnh"
+HYPHEN_BREAK = re.compile(r'(\w+)-\s*\n\s*(\w+)')
+# Xuống dòng, tab và "_" -> khoảng trắng
+SPACE_TABLE = str.maketrans({"\n": " ", "\r": " ", "\t": " ", "_": " "})
+PUNCTUATION = re.compile(r'([.,!?;:()])')
+NOISE = re.compile(r'[^\w\s.,!?;:()-]+')
+# Quốc hiệu bị OCR chèn số: "độc lập 2 tự do 5 hạnh phúc"
+MOTTO_NUMBERS = re.compile(r'(độc lập) \d+ (tự do) \d+ (hạnh phúc)')
+
+# Định dạng văn bản hành chính (từng câu)
+OFFICIAL_HEADER = re.compile(
+    r"bộ giáo dục và đào tạo cộng hòa xã hội chủ nghĩa việt nam độc lập\s+2\s+tự do\s+5\s+hanh phúc",
+    re.IGNORECASE)
+OFFICIAL_HEADER_TEXT = "BỘ GIÁO DỤC VÀ ĐÀO TẠO\n CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM\n Độc lập - Tự do - Hạnh phúc"
+OFFICIAL_PUNCTUATION = re.compile(r'\s*([.,;:()])\s*')
+
+
+def load_corrections(corrections_path=None):
+    """
+    Tải bảng sửa lỗi từ file JSON.
+
+    Args:
+        corrections_path (str, optional): Đường dẫn file (mặc định ocr_corrections.json
+            cùng thư mục)
+
+    Returns:
+        dict: {"version", "corrections", "format_replacements"}
+    """
+    if corrections_path is None:
+        corrections_path = DEFAULT_CORRECTIONS_PATH
+    try:
+        with open(corrections_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠ Cảnh báo: Không thể tải file '{corrections_path}': {e}")
+        return {}
+
+
+def _is_boundary(text, i):
+    """Có ranh giới từ (\\b) giữa text[i-1] và text[i] hay không."""
+    return (text[i - 1].isalnum() or text[i - 1] == '_') != (text[i].isalnum() or text[i] == '_')
+
+
+def _order_dependent(corrections):
+    """
+    Cặp (khóa, khóa khác) mà thay lần lượt và thay một lượt có thể cho kết quả khác:
+    khóa khác nằm trong khóa/giá trị thay thế, hoặc nối tiếp được với đầu/cuối của
+    chúng tại một ranh giới từ.
+    """
+    for old, new in corrections.items():
+        for other in corrections:
+            if other == old:
+                continue
+            for text in (old, new):
+                if other in text:
+                    return old, other
+                for i in range(1, len(text)):
+                    if not _is_boundary(text, i):
+                        continue
+                    if other.startswith(text[i:]) or other.endswith(text[:i]):
+                        return old, other
+    return None
+
+
+def _compile_corrections(corrections):
+    """Một regex khớp mọi khóa (nguyên từ, khóa dài thử trước); None nếu bảng rỗng."""
+    if not corrections:
+        return None
+    conflict = _order_dependent(corrections)
+    if conflict:
+        raise ValueError(f"Correction '{conflict[1]}' overlaps '{conflict[0]}'; "
+                         "single-pass output would depend on the order of the map")
+    pattern = "|".join(re.escape(old) for old in sorted(corrections, key=len, reverse=True))
+    return re.compile(rf"\b(?:{pattern})\b")
+
+
+class TextCleaner:
+    """
+    Làm sạch và sửa lỗi OCR cho văn bản tiếng Việt với các regex biên dịch sẵn.
+    """
+
+    def __init__(self, corrections_path=None):
+        """
+        Args:
+            corrections_path (str, optional): File bảng sửa lỗi (xem load_corrections)
+        """
+        data = load_corrections(corrections_path)
+        self.version = data.get('version')
+        self.corrections = data.get('corrections', {})
+        self.format_replacements = data.get('format_replacements', {})
+        self._corrections_re = _compile_corrections(self.corrections)
+
+    def clean(self, text):
+        """Làm sạch một đoạn văn bản: chữ thường, nối dòng, NFC, bỏ ký tự nhiễu, sửa lỗi OCR."""
+        text = HYPHEN_BREAK.sub(r'\1\2', text.lower())
+        text = unicodedata.normalize('NFC', text.translate(SPACE_TABLE))
+        text = PUNCTUATION.sub(r' \1 ', text)
+        text = NOISE.sub(' ', text)
+        if self._corrections_re is not None:
+            corrections = self.corrections
+            text = self._corrections_re.sub(lambda m: corrections[m.group(0)], text)
+        text = MOTTO_NUMBERS.sub(r'\1 \2 \3', text)
+        return " ".join(text.split())
+
+    def format_sentence(self, sentence):
+        """Định dạng một câu đã làm sạch theo văn bản hành chính."""
+        # Vài mục, câu ngắn: str.replace theo thứ tự trong file (có mục nối tiếp nhau)
+        for old, new in self.format_replacements.items():
+            sentence = sentence.replace(old, new)
+        sentence = OFFICIAL_HEADER.sub(OFFICIAL_HEADER_TEXT, sentence)
+        sentence = OFFICIAL_PUNCTUATION.sub(r' \1 ', sentence)
+        return " ".join(sentence.split())
@@ -8,7 +8,22 @@ import sys
 
 # from text_cleaner import clean_text_preserve_case, clean_text_lowercase # Removed redundant cleaning
 from pos_tagger import POSTagger
-from hybrid_ner import analyze_hybrid_ner
+from hybrid_ner import analyze_hybrid_ner, build_rule_ruler, load_rule_patterns
+from syntax_parsing import analyze_dependency_parsing
+
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chay doc lap (khong co pipeline_metrics.py tren sys.path)
+    from contextlib import nullcontext as timed
+
+# Profile phân tích: các component spaCy KHÔNG nạp (spacy.load(..., exclude=...))
+ANALYSIS_PROFILES = {
+    # POS, Hybrid NER và cú pháp phụ thuộc
+    "full": (),
+    # Trích xuất trường: POS và Hybrid NER, không chạy parser (câu lấy từ sentencizer).
+    # "ner" của spaCy cũng bỏ vì doc.ents luôn được thay bằng entities đã merge
+    "fields": ("parser", "ner"),
+}
 
 
 class DocumentAnalyzer:
@@ -17,36 +32,47 @@ class DocumentAnalyzer:
     Kết hợp trích xuất PDF, POS Tagging và NER.
     """
     
-    def __init__(self, model_name='vi_core_news_lg', corrections_path=None):
+    def __init__(self, model_name='vi_core_news_lg', corrections_path=None, patterns_path=None,
+                 profile="full"):
         """
         Khởi tạo Document Analyzer.
         
         Args:
             model_name (str): Tên mô hình spaCy cần load
             corrections_path (str, optional): Đường dẫn đến file corrections.json
+            patterns_path (str, optional): Đường dẫn đến file ner_patterns.json
+            profile (str): Profile phân tích trong ANALYSIS_PROFILES ("fields" không
+                nạp parser: nhanh hơn, không có kết quả cú pháp phụ thuộc)
         """
-        self.nlp = self._load_model(model_name)
+        if profile not in ANALYSIS_PROFILES:
+            raise ValueError(f"Unknown analysis profile: {profile} (choose from {', '.join(ANALYSIS_PROFILES)})")
+        self.profile = profile
+        self.nlp = self._load_model(model_name, exclude=ANALYSIS_PROFILES[profile])
         self.pos_tagger = POSTagger(self.nlp, corrections_path)
+        # EntityRuler độc lập, biên dịch patterns một lần và dùng lại cho mọi tài liệu
+        self.rule_patterns_version, patterns = load_rule_patterns(patterns_path)
+        self.rule_ruler = build_rule_ruler(self.nlp, patterns)
     
-    def _load_model(self, model_name):
+    def _load_model(self, model_name, exclude=()):
         """
         Tải mô hình spaCy.
         
         Args:
             model_name (str): Tên mô hình cần load
+            exclude (tuple): Các component không nạp
         
         Returns:
             spacy.Language: Mô hình spaCy đã load
         """
         nlp = None
         try:
-            nlp = spacy.load(model_name)
+            nlp = spacy.load(model_name, exclude=list(exclude))
         except OSError:
             print(f"Loi: Khong tim thay mo hinh '{model_name}'")
             fallback_model = 'xx_ent_wiki_sm'
             print(f"Dang thu load fallback model '{fallback_model}'...")
             try:
-                nlp = spacy.load(fallback_model)
+                nlp = spacy.load(fallback_model, exclude=list(exclude))
             except OSError:
                 print(f"Loi: Khong tim thay ca fallback model '{fallback_model}'")
                 print(f"Chay: python -m spacy download {model_name}")
@@ -87,11 +113,81 @@ class DocumentAnalyzer:
             tuple: (doc_hybrid, entities) - Document và danh sách entities
         """
         # cleaned_text = clean_text_preserve_case(text) # Redundant
-        return analyze_hybrid_ner(self.nlp, text)
+        return analyze_hybrid_ner(self.nlp, text, ruler=self.rule_ruler)
+    
+    def analyze_shared(self, text, dependency=True, output_dir=None):
+        """
+        Phân tích POS, Hybrid NER và cú pháp phụ thuộc trên MỘT lần parse spaCy.
+        
+        analyze_pos/analyze_ner/analyze_dependency_parsing mỗi hàm tự gọi nlp(text),
+        tức 3 lần chạy cả pipeline cho cùng văn bản. Ở đây văn bản được parse một lần;
+        EntityRuler (self.rule_ruler) chạy độc lập trên doc đó và entities merged được
+        gán vào chính doc. Kết quả POS, entities và cây phụ thuộc giống
+        hệt cách chạy riêng từng bước.
+        
+        Args:
+            text (str): Văn bản gốc (đã được làm sạch từ Module 1)
+            dependency (bool): In/ghi kết quả phân tích cú pháp (cần 'parser')
+            output_dir (str, optional): Thư mục lưu dependency_parse.html
+        
+        Returns:
+            dict: Kết quả phân tích
+                - 'doc': spaCy Doc dùng chung (.ents là entities đã merge)
+                - 'pos_tags': List POS tags đã sửa lỗi
+                - 'ner_entities': List entities đã merge
+                - 'dep_doc': doc nếu đã phân tích cú pháp, ngược lại None
+        """
+        with timed("spacy_parse"):
+            doc = self.nlp(text)
+        return self._analyze_doc(text, doc, dependency, output_dir)
+    
+    def analyze_many(self, texts, batch_size=8, n_process=1, dependency=False):
+        """
+        Phân tích nhiều văn bản: spaCy parse theo lô bằng nlp.pipe, sau đó POS, Hybrid
+        NER (underthesea + EntityRuler) cho từng Doc như analyze_shared.
+        
+        Văn bản được đọc dần từ texts (có thể là generator) và kết quả được trả về
+        dần theo đúng thứ tự đầu vào, nên không cần giữ cả batch trong bộ nhớ.
+        
+        Args:
+            texts (iterable): Các văn bản (đã được làm sạch từ Module 1)
+            batch_size (int): Số văn bản mỗi lô của nlp.pipe
+            n_process (int): Số tiến trình spaCy (>1 dùng multiprocessing, mỗi tiến
+                trình nạp một bản mô hình)
+            dependency (bool): In kết quả phân tích cú pháp (không ghi HTML)
+        
+        Yields:
+            dict: Kết quả của từng văn bản, cùng dạng với analyze_shared
+        """
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process)
+        while True:
+            # Lần next() đầu của mỗi lô chịu thời gian parse cả lô
+            with timed("spacy_parse"):
+                doc = next(docs, None)
+            if doc is None:
+                return
+            yield self._analyze_doc(doc.text, doc, dependency, None)
+    
+    def _analyze_doc(self, text, doc, dependency, output_dir):
+        """POS, Hybrid NER và (tùy chọn) cú pháp trên một Doc đã parse từ text."""
+        _, pos_tags = self.pos_tagger.tag(text, doc=doc)
+        
+        doc, ner_entities = analyze_hybrid_ner(self.nlp, text, doc=doc, ruler=self.rule_ruler)
+        
+        dep_doc = None
+        if dependency and 'parser' in self.nlp.pipe_names:
+            dep_doc = analyze_dependency_parsing(self.nlp, text, output_dir=output_dir, doc=doc)
+        
+        return {
+            'doc': doc,
+            'pos_tags': pos_tags,
+            'ner_entities': ner_entities,
+            'dep_doc': dep_doc
+        }
     
     def analyze_full(self, text):
         """
-        Phân tích toàn diện: cả POS và Hybrid NER.
+        Phân tích toàn diện: cả POS và Hybrid NER (một lần parse, xem analyze_shared).
         
         Args:
             text (str): Văn bản gốc
@@ -103,17 +199,13 @@ class DocumentAnalyzer:
                 - 'ner_doc': spaCy Doc cho Hybrid NER
                 - 'ner_entities': List entities đã merge
         """
-        # Phân tích POS
-        pos_doc, pos_tags = self.analyze_pos(text)
-        
-        # Phân tích Hybrid NER
-        ner_doc, ner_entities = self.analyze_ner(text)
+        result = self.analyze_shared(text, dependency=False)
         
         return {
-            'pos_doc': pos_doc,
-            'pos_tags': pos_tags,
-            'ner_doc': ner_doc,
-            'ner_entities': ner_entities
+            'pos_doc': result['doc'],
+            'pos_tags': result['pos_tags'],
+            'ner_doc': result['doc'],
+            'ner_entities': result['ner_entities']
         }
     
     def analyze_txt_file(self, txt_path):
@@ -140,6 +232,19 @@ class DocumentAnalyzer:
             print(f"Loi khi doc file {txt_path}: {e}")
             return None
     
+    def output_config(self):
+        """
+        Các tham số ảnh hưởng tới kết quả phân tích (dùng cho khóa cache stage Module 2).
+        
+        Returns:
+            dict: Tên mô hình, profile phân tích và phiên bản ner_patterns.json
+        """
+        return {
+            'model': self.nlp.meta.get('name'),
+            'profile': self.profile,
+            'ner_patterns_version': self.rule_patterns_version
+        }
+    
     def get_stats(self):
         """
         Lấy thông tin thống kê về analyzer.
@@ -149,5 +254,7 @@ class DocumentAnalyzer:
         """
         return {
             'model': self.nlp.meta['name'],
+            'profile': self.profile,
+            'components': list(self.nlp.pipe_names),
             'pos_correction_rules': self.pos_tagger.get_stats()['total_rules']
         }
@@ -16,10 +16,40 @@ LOGIC XỬ LÝ XUNG ĐỘT:
 3. Overlap được định nghĩa: có ít nhất 1 ký tự chung (character-level)
 """
 
-from underthesea import ner as underthesea_ner
 import os
+import json
 from spacy.tokens import Span, Doc
 
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chay doc lap (khong co pipeline_metrics.py tren sys.path)
+    from contextlib import nullcontext as timed
+
+DEFAULT_PATTERNS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ner_patterns.json")
+
+
+def load_rule_patterns(patterns_path=None):
+    """
+    Tải patterns của Luồng B (EntityRuler) từ file JSON.
+    
+    Args:
+        patterns_path (str, optional): Đường dẫn file (mặc định ner_patterns.json
+            cùng thư mục)
+    
+    Returns:
+        tuple: (version, patterns) - patterns chỉ giữ "label" và "pattern"
+    """
+    if patterns_path is None:
+        patterns_path = DEFAULT_PATTERNS_PATH
+    try:
+        with open(patterns_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"⚠ Cảnh báo: Không thể tải file '{patterns_path}': {e}")
+        return None, []
+    patterns = [{"label": p["label"], "pattern": p["pattern"]} for p in data.get('patterns', [])]
+    return data.get('version'), patterns
+
 
 def _has_overlap(span1_start, span1_end, span2_start, span2_end):
     """
@@ -383,20 +413,39 @@ def _parse_ruler_entities(doc_with_ruler):
     return entities
 
 
-def _create_spacy_doc_with_entities(nlp, text, merged_entities):
+def build_rule_ruler(nlp, patterns=None):
     """
-    Tạo spaCy Doc với entities đã merge.
+    Tạo EntityRuler độc lập (không gắn vào nlp.pipeline).
+    
+    Ruler được gọi trực tiếp trên Doc đã parse: ruler(doc). nlp.pipeline không bị
+    thay đổi, nên một nlp dùng chung giữa các luồng vẫn an toàn. Patterns được biên
+    dịch một lần khi tạo ruler; DocumentAnalyzer tạo ruler một lần khi khởi tạo.
     
     Args:
-        nlp: spaCy model
-        text: Văn bản gốc
+        nlp: spaCy model (dùng vocab)
+        patterns (list, optional): Patterns (mặc định từ load_rule_patterns())
+    
+    Returns:
+        EntityRuler với overwrite_ents=True
+    """
+    if patterns is None:
+        _, patterns = load_rule_patterns()
+    ruler = nlp.create_pipe("entity_ruler", config={"overwrite_ents": True})
+    ruler.add_patterns(patterns)
+    return ruler
+
+
+def _set_doc_entities(doc, merged_entities):
+    """
+    Gán entities đã merge vào doc.ents.
+    
+    Args:
+        doc: spaCy Doc
         merged_entities: List[dict] - Entities sau khi merge
     
     Returns:
         spacy.Doc với .ents đã được set
     """
-    doc = nlp(text)
-    
     # Chuyển entities từ dict sang spaCy Span
     spans = []
     for ent in merged_entities:
@@ -416,7 +465,7 @@ def _create_spacy_doc_with_entities(nlp, text, merged_entities):
     return doc
 
 
-def analyze_hybrid_ner(nlp, raw_text):
+def analyze_hybrid_ner(nlp, raw_text, doc=None, ruler=None):
     """
     Phân tích Hybrid NER với Conflict Resolution đúng chuẩn.
     
@@ -424,11 +473,16 @@ def analyze_hybrid_ner(nlp, raw_text):
     1. Luồng A: underthesea.ner() → statistical entities
     2. Luồng B: spaCy EntityRuler → rule-based entities
     3. Tầng Hợp nhất: _resolve_conflicts() → merged entities
-    4. Tạo spaCy Doc với entities đã merge
+    4. Gán entities đã merge vào spaCy Doc
+    
+    Luồng B chạy ruler độc lập trên doc (nlp.pipeline không bị thay đổi) và entities
+    merged được gán vào chính doc đó. Nếu không truyền doc, văn bản được parse một lần.
     
     Args:
         nlp: spaCy model (có pipeline: tok2vec, tagger, parser)
         raw_text: Văn bản gốc
+        doc: spaCy Doc của raw_text dùng chung (tùy chọn)
+        ruler: EntityRuler từ build_rule_ruler() (tùy chọn; nên tạo một lần và dùng lại)
     
     Returns:
         tuple: (doc_hybrid, merged_entities)
@@ -441,7 +495,9 @@ def analyze_hybrid_ner(nlp, raw_text):
     
     # ==================== LUỒNG A: STATISTICAL NER ====================
     print("\n[LUỒNG A] Statistical NER (underthesea)...")
-    underthesea_result = underthesea_ner(raw_text)
+    from underthesea import ner as underthesea_ner  # import lazy: nap model khi can
+    with timed("underthesea_ner"):
+        underthesea_result = underthesea_ner(raw_text)
     debug_stat = os.environ.get('DEBUG_STAT_NER') == '1'
     stat_entities = _parse_underthesea_entities(underthesea_result, raw_text, debug=debug_stat)
     
@@ -460,152 +516,13 @@ def analyze_hybrid_ner(nlp, raw_text):
     # ==================== LUỒNG B: RULE-BASED NER ====================
     print("\n[LUỒNG B] Rule-based NER (EntityRuler)...")
     
-    # Xóa EntityRuler cũ nếu có
-    if "entity_ruler" in nlp.pipe_names:
-        nlp.remove_pipe("entity_ruler")
-    
-    # Định nghĩa patterns
-    patterns = [
-        # ISSUE_DATE - Ngày ban hành (linh hoạt số 1-2 chữ số, năm 2-4 chữ số)
-        {
-            "label": "ISSUE_DATE",
-            "pattern": [
-                {"LOWER": "ngày"},
-                {"IS_DIGIT": True},
-                {"LOWER": "tháng"},
-                {"IS_DIGIT": True},
-                {"LOWER": "năm"},
-                {"IS_DIGIT": True}
-            ]
-        },
-        # DECISION_ID - Dạng "số 37 2025 nđ-cp" hoặc "số 37 nđ-cp"
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_PUNCT": True, "OP": "*"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"IS_DIGIT": True},
-                {"IS_SPACE": True, "OP": "*"},
-                {"IS_DIGIT": True, "OP": "?"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"LOWER": {"REGEX": r"^(nđ-cp|qđ-bgdđt)$"}}
-            ]
-        },
-        # DECISION_ID - Dạng "số 92/2017/nđ-cp" (1 token hoặc nhiều token tách bởi '/')
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"TEXT": {"REGEX": r"^\d{1,4}/\d{2,4}(/[-\wđ]+)?$"}}
-            ]
-        },
-        # DECISION_ID - Dạng "số 37/2025/nđ-cp" với mã code BẮT BUỘC
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"IS_DIGIT": True},
-                {"TEXT": "/"},
-                {"IS_DIGIT": True},
-                {"TEXT": "/"},
-                {"LOWER": {"REGEX": r"^(nđ-cp|qđ-bgdđt)$"}}
-            ]
-        },
-        # DECISION_ID - Dạng "số 2827/qđ-bgdđt" (không có năm)
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"IS_DIGIT": True},
-                {"TEXT": "/"},
-                {"LOWER": "qđ"},
-                {"TEXT": "-"},
-                {"LOWER": "bgdđt"}
-            ]
-        },
-        # DECISION_ID - Dạng một token sau "số": "2827/qđ-bgdđt" hoặc "37/2025/nđ-cp"
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_SPACE": True, "OP": "*"},
-                {"TEXT": {"REGEX": r"^(?:\d{1,6}/(?:\d{4}/)?(?:nđ-cp|qđ-bgdđt))$"}}
-            ]
-        },
-        # DECISION_ID - Dạng "số . 2750 qđ-bgdđt" (mã tách bởi dấu gạch)
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_PUNCT": True, "OP": "*"},
-                {"IS_DIGIT": True},
-                {"LOWER": "qđ"},
-                {"TEXT": "-"},
-                {"LOWER": "bgdđt"}
-            ]
-        },
-        # DECISION_ID - Dạng "số 37 2025 nđ - cp" (mã tách bởi dấu gạch và khoảng)
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"LOWER": "số"},
-                {"IS_DIGIT": True},
-                {"IS_DIGIT": True, "OP": "?"},
-                {"LOWER": "nđ"},
-                {"TEXT": "-"},
-                {"LOWER": "cp"}
-            ]
-        },
-        # DECISION_ID - Dạng "2750 qđ-bgdđt" (không có chữ "số")
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"IS_DIGIT": True},
-                {"IS_SPACE": True, "OP": "*"},
-                {"LOWER": {"REGEX": r"^(qđ-bgdđt|nđ-cp)$"}}
-            ]
-        },
-        # DECISION_ID - Dạng "2750 qđ - bgdđt" tách token theo dấu gạch
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"IS_DIGIT": True},
-                {"LOWER": "qđ"},
-                {"TEXT": "-"},
-                {"LOWER": "bgdđt"}
-            ]
-        },
-        # DECISION_ID - Dạng "63 2010 nđ - cp"
-        {
-            "label": "DECISION_ID",
-            "pattern": [
-                {"IS_DIGIT": True},
-                {"IS_DIGIT": True},
-                {"LOWER": "nđ"},
-                {"TEXT": "-"},
-                {"LOWER": "cp"}
-            ]
-        }
-    ]
-    
-    # Thêm EntityRuler SAU parser với overwrite_ents=True
-    if "parser" in nlp.pipe_names:
-        ruler = nlp.add_pipe("entity_ruler", after="parser", 
-                            config={"overwrite_ents": True})
-    elif "ner" in nlp.pipe_names:
-        ruler = nlp.add_pipe("entity_ruler", after="ner", 
-                            config={"overwrite_ents": True})
-    else:
-        ruler = nlp.add_pipe("entity_ruler", last=True, 
-                            config={"overwrite_ents": True})
-    ruler.add_patterns(patterns)
-    
-    # Xử lý văn bản
-    doc_with_ruler = nlp(raw_text)
+    if doc is None:
+        with timed("spacy_parse"):
+            doc = nlp(raw_text)
+    if ruler is None:
+        ruler = build_rule_ruler(nlp)
+    with timed("spacy_ruler"):
+        doc_with_ruler = ruler(doc)
     rule_entities = _parse_ruler_entities(doc_with_ruler)
     
     print(f"  → Tìm thấy {len(rule_entities)} rule-based entities")
@@ -629,10 +546,7 @@ def analyze_hybrid_ner(nlp, raw_text):
     # ==================== TẠO SPACY DOC ====================
     print("\n[XUẤT KẾT QUẢ] Tạo spaCy Doc với entities merged...")
     
-    doc_hybrid = _create_spacy_doc_with_entities(nlp, raw_text, merged_entities)
-    
-    # Xóa EntityRuler sau khi xử lý
-    nlp.remove_pipe("entity_ruler")
+    doc_hybrid = _set_doc_entities(doc_with_ruler, merged_entities)
     
     # ==================== HIỂN THỊ TỔNG HỢP ====================
     print("\n" + "=" * 70)
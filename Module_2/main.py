@@ -15,7 +15,6 @@ if sys.platform == 'win32':
 from analyzer import DocumentAnalyzer
 from syntax_parsing import analyze_dependency_parsing
 from json_serializer import serialize_full_analysis_to_json, save_json_output, print_json_preview
-import spacy
 
 
 def select_test_file():
@@ -161,7 +160,8 @@ def main():
     
     print("\nDang tai mo hinh spaCy...")
     analyzer = DocumentAnalyzer(model_name='vi_core_news_lg')
-    nlp = spacy.load('vi_core_news_lg')
+    # Dung lai model cua analyzer thay vi load lan thu hai
+    nlp = analyzer.nlp
     
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
@@ -5,6 +5,14 @@ Sử dụng spaCy và các quy tắc sửa lỗi tùy chỉnh.
 import json
 import os
 
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chay doc lap (khong co pipeline_metrics.py tren sys.path)
+    from contextlib import nullcontext as timed
+
+# Component không ảnh hưởng tới token.tag_: tắt khi POS tagging chạy riêng
+POS_UNUSED_COMPONENTS = ("parser", "ner")
+
 
 class POSTagger:
     """
@@ -45,19 +53,23 @@ class POSTagger:
             print(f"⚠ Cảnh báo: Không thể tải file '{corrections_path}': {e}")
             return {}
     
-    def tag(self, text):
+    def tag(self, text, doc=None):
         """
         Thực hiện POS tagging cho văn bản.
         
         Args:
             text (str): Văn bản đã được làm sạch (lowercase)
+            doc: spaCy Doc của text đã parse sẵn (tùy chọn, không chạy lại nlp).
+                Nếu không có, text được parse với parser/ner tắt cho lần gọi này
         
         Returns:
             tuple: (doc, corrected_tags)
                 - doc: spaCy Doc object
                 - corrected_tags: List các POS tags đã được sửa lỗi
         """
-        doc = self.nlp(text)
+        if doc is None:
+            with timed("spacy_pos"):
+                doc = self.nlp(text, disable=POS_UNUSED_COMPONENTS)
         corrected_tags = self._apply_corrections(doc)
         return doc, corrected_tags
     
@@ -0,0 +1,168 @@
+"""
+Rule-based NER (Luồng B) bằng regex biên dịch sẵn, không cần spaCy.
+
+Các pattern của EntityRuler (ner_patterns.json) chỉ nhận dạng hai dạng: số hiệu văn
+bản ("số 37 2025 nđ-cp", "2750 qđ-bgdđt", "số 92/2017/nđ-cp") và ngày ban hành
+("ngày 14 tháng 7 năm 2025"), nhưng phải tokenize và parse cả văn bản bằng spaCy mới
+chạy được. RuleNER viết lại các pattern đó thành regex trên văn bản thô và trả về
+entities cùng dạng với hybrid_ner._parse_ruler_entities.
+
+RuleNER(legacy=True) dịch từng pattern của ner_patterns.json version 1 sang regex
+(LEGACY_RULES), coi mỗi cụm không có khoảng trắng là một token: "nđ-cp" là một token,
+"nđ - cp" là ba token. Kết quả phải giống hệt EntityRuler; benchmarks/rule_ner_bench.py
+kiểm tra điều này với tokenizer thật và báo lỗi nếu có khác biệt.
+
+Mặc định (RuleNER()) nhận thêm:
+- Mã văn bản không giới hạn ở nđ-cp/qđ-bgdđt khi có ngữ cảnh số hiệu: sau chữ "số"
+  ("số 12 nq - cp", "số 3/kh-ubnd") hoặc viết với "/" ("1234/qđ-ttg"), mọi loại văn
+  bản trong DOC_TYPES với cơ quan ban hành bất kỳ.
+- Số đứng trần trước mã ("2750 qđ-bgdđt") chỉ được nhận khi cơ quan ban hành nằm
+  trong ISSUERS, để "điều 3 kh - bc" hay "có 2 tb - ct được" không thành số hiệu.
+- Số hiệu viết liền bị tokenizer tách ở "/" ("92/2017/nđ-cp") được lấy trọn.
+
+Các match chồng nhau được lọc như spacy.util.filter_spans: span dài hơn thắng, bằng
+nhau thì span đứng trước thắng. So sánh kết quả và tốc độ với EntityRuler:
+benchmarks/rule_ner_bench.py.
+"""
+import re
+
+# Mã loại văn bản đứng trước cơ quan ban hành: "qđ-bgdđt", "tt-btc", "nq-cp"...
+DOC_TYPES = ("ttlt", "nđ", "qđ", "tt", "nq", "ct", "kh", "tb", "hd", "cv", "pl", "bc")
+
+# Cơ quan ban hành được nhận khi số hiệu không có "số" hoặc "/" đi kèm
+ISSUERS = ("cp", "ttg", "vpcp", "qh", "ubtvqh", "ubnd", "hđnd", "nhnn", "bgdđt", "btc", "bnv", "bca",
+           "bqp", "byt", "bct", "btp", "bng", "bxd", "btnmt", "blđtbxh", "bkhđt", "bgtvt", "bnnptnt",
+           "btttt", "bvhttdl", "bkhcn", "ttcp", "kttn", "đhqg")
+
+_HYPHEN = r"\s*-\s*"
+# Cuối token: không dính chữ/số hoặc "/" phía sau
+_END = r"(?![\w/])"
+
+# ner_patterns.json version 1, từng pattern một (token = cụm không có khoảng trắng)
+_TOKEN_START = r"(?<!\S)"
+_TOKEN_END = r"(?!\S)"
+_LEGACY_CODE = r"(?:nđ-cp|qđ-bgdđt)"
+LEGACY_RULES = [
+    # ngày DIGIT tháng DIGIT năm DIGIT
+    ("ISSUE_DATE", r"ngày\s+\d+\s+tháng\s+\d+\s+năm\s+\d+"),
+    # số PUNCT* DIGIT DIGIT? "nđ-cp"
+    ("DECISION_ID", r"số(?:\s+[^\w\s]+)*\s+\d+(?:\s+\d+)?\s+" + _LEGACY_CODE),
+    # số "92/2017(/...)" (TEXT: phân biệt hoa thường)
+    ("DECISION_ID", r"số\s+(?-i:\d{1,4}/\d{2,4}(?:/[-\w]+)?)"),
+    # số DIGIT / DIGIT / "nđ-cp"
+    ("DECISION_ID", r"số\s+\d+\s+/\s+\d+\s+/\s+" + _LEGACY_CODE),
+    # số DIGIT / qđ - bgdđt
+    ("DECISION_ID", r"số\s+\d+\s+/\s+qđ\s+-\s+bgdđt"),
+    # số "2827/qđ-bgdđt" hoặc "37/2025/nđ-cp" (TEXT: phân biệt hoa thường)
+    ("DECISION_ID", r"số\s+(?-i:\d{1,6}/(?:\d{4}/)?(?:nđ-cp|qđ-bgdđt))"),
+    # số PUNCT* DIGIT qđ - bgdđt
+    ("DECISION_ID", r"số(?:\s+[^\w\s]+)*\s+\d+\s+qđ\s+-\s+bgdđt"),
+    # số DIGIT DIGIT? nđ - cp
+    ("DECISION_ID", r"số\s+\d+(?:\s+\d+)?\s+nđ\s+-\s+cp"),
+    # DIGIT "qđ-bgdđt"
+    ("DECISION_ID", r"\d+\s+" + _LEGACY_CODE),
+    # DIGIT qđ - bgdđt
+    ("DECISION_ID", r"\d+\s+qđ\s+-\s+bgdđt"),
+    # DIGIT DIGIT nđ - cp
+    ("DECISION_ID", r"\d+\s+\d+\s+nđ\s+-\s+cp"),
+]
+
+
+def _code_pattern(issuers=None):
+    """Regex mã văn bản: loại văn bản + cơ quan ban hành (trong issuers, hoặc bất kỳ)."""
+    types = "|".join(sorted(DOC_TYPES, key=len, reverse=True))
+    if issuers:
+        issuer = "(?:" + "|".join(sorted(issuers, key=len, reverse=True)) + ")"
+    else:
+        issuer = "[a-zđ]{2,8}"
+    return rf"(?:{types}){_HYPHEN}{issuer}\d{{0,2}}(?:{_HYPHEN}{issuer})*"
+
+
+def compile_rules(legacy=False):
+    """
+    Biên dịch các regex của Luồng B.
+
+    Args:
+        legacy (bool): True để dùng đúng các pattern của ner_patterns.json (LEGACY_RULES)
+
+    Returns:
+        list: [(label, compiled regex)]
+    """
+    if legacy:
+        return [(label, re.compile(_TOKEN_START + pattern + _TOKEN_END, re.IGNORECASE))
+                for label, pattern in LEGACY_RULES]
+
+    code, known_code = _code_pattern(), _code_pattern(ISSUERS)
+    so = r"(?<!\w)số"
+    rules = [
+        # "ngày 14 tháng 7 năm 2025"
+        ("ISSUE_DATE", r"(?<!\w)ngày\s+\d+\s+tháng\s+\d+\s+năm\s+\d+" + _END),
+        # "số 37 2025 nđ-cp", "số . 2750 qđ - bgdđt"
+        ("DECISION_ID", so + r"(?:\s*[.,:;])*\s*\d+(?:\s+\d+)?\s+" + code + _END),
+        # "số 37/2025/nđ-cp", "số 2827/qđ-bgdđt", "số 37 / 2025 / nđ - cp"
+        ("DECISION_ID", so + r"\s+\d+\s*/\s*(?:\d+\s*/\s*)?" + code + _END),
+        # "số 92/2017", "số 92/2017/nđ-cp" (một token sau "số")
+        ("DECISION_ID", so + r"\s+\d{1,4}/\d{2,4}(?:/[-\w]+)?" + _END),
+        # "2750 qđ-bgdđt", "63 2010 nđ - cp" (không có chữ "số": chỉ cơ quan trong ISSUERS)
+        ("DECISION_ID", r"(?<![\w/])\d+(?:\s+\d+)?\s+" + known_code + _END),
+        # "1234/qđ-ttg", "08/2021/tt-bgdđt" (không có chữ "số")
+        ("DECISION_ID", r"(?<![\w/])\d+\s*/\s*(?:\d+\s*/\s*)?" + code + _END),
+    ]
+    return [(label, re.compile(pattern, re.IGNORECASE)) for label, pattern in rules]
+
+
+class RuleNER:
+    """
+    Nhận dạng DECISION_ID và ISSUE_DATE bằng regex biên dịch sẵn.
+    """
+
+    def __init__(self, legacy=False):
+        """
+        Args:
+            legacy (bool): True để cho kết quả giống EntityRuler (xem compile_rules)
+        """
+        self.rules = compile_rules(legacy)
+
+    def extract(self, text):
+        """
+        Trích xuất rule-based entities từ văn bản.
+
+        Args:
+            text (str): Văn bản (đã làm sạch từ Module 1 hoặc văn bản gốc)
+
+        Returns:
+            List[dict] - Cùng format với hybrid_ner._parse_ruler_entities:
+                {'text', 'label', 'start', 'end', 'source': 'rule-based'}, theo thứ tự
+                xuất hiện
+        """
+        matches = []
+        for label, regex in self.rules:
+            for m in regex.finditer(text):
+                matches.append((m.start(), m.end(), label))
+
+        # Giống filter_spans: dài hơn trước, bằng nhau thì đứng trước trước
+        matches.sort(key=lambda m: (m[0] - m[1], m[0]))
+        kept, taken = [], set()
+        for start, end, label in matches:
+            if taken.isdisjoint(range(start, end)):
+                kept.append((start, end, label))
+                taken.update(range(start, end))
+
+        return [{
+            'text': text[start:end],
+            'label': label,
+            'start': start,
+            'end': end,
+            'source': 'rule-based'
+        } for start, end, label in sorted(kept)]
+
+
+_default_ner = None
+
+
+def extract_rule_entities(text):
+    """RuleNER().extract(text) với một RuleNER dùng chung (biên dịch một lần)."""
+    global _default_ner
+    if _default_ner is None:
+        _default_ner = RuleNER()
+    return _default_ner.extract(text)
@@ -4,15 +4,21 @@ Module phân tích cú pháp phụ thuộc (Dependency Parsing).
 import os
 from spacy import displacy
 
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chay doc lap (khong co pipeline_metrics.py tren sys.path)
+    from contextlib import nullcontext as timed
 
-def analyze_dependency_parsing(nlp, raw_text, output_dir="."):
+
+def analyze_dependency_parsing(nlp, raw_text, output_dir=".", doc=None):
     """
     Phan tich cu phap phu thuoc.
     
     Args:
         nlp: spaCy model
         raw_text: Van ban goc
-        output_dir: Thu muc luu HTML
+        output_dir: Thu muc luu HTML (None de khong ghi file)
+        doc: spaCy Doc cua raw_text da parse san (tuy chon, khong chay lai nlp)
     
     Returns:
         str: Duong dan file HTML
@@ -25,7 +31,9 @@ def analyze_dependency_parsing(nlp, raw_text, output_dir="."):
         print("Warning: Model does not support dependency parsing (no 'parser' component).")
         return None
 
-    doc = nlp(raw_text)
+    if doc is None:
+        with timed("spacy_dep"):
+            doc = nlp(raw_text)
     sentences = list(doc.sents)
     
     if not sentences:
@@ -44,6 +52,9 @@ def analyze_dependency_parsing(nlp, raw_text, output_dir="."):
         for token in sentence:
             print(f"{token.text:<20} {token.dep_:<15} {token.head.text:<20}")
     
+    if output_dir is None:
+        return doc
+
     print("\nTruc quan hoa cau dau tien:")
     output_path = os.path.join(output_dir, "dependency_parse.html")
     
@@ -4,8 +4,12 @@ import time
 import re
 import random
 from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+# google.genai được import khi gọi API lần đầu (kết quả lấy từ cache không cần đến SDK)
+
+try:
+    from pipeline_metrics import timed
+except ImportError:  # Chạy độc lập (không có pipeline_metrics.py trên sys.path)
+    from contextlib import nullcontext as timed
 
 # Load environment variables
 load_dotenv()
@@ -14,6 +18,19 @@ load_dotenv()
 # Đảm bảo bạn đã cài đặt biến môi trường GEMINI_API_KEY
 api_key = os.environ.get("GEMINI_API_KEY")
 
+# Client được tạo một lần cho mỗi tiến trình và dùng lại giữa các lần gọi
+_client = None
+
+def get_client():
+    """
+    Trả về Gemini Client dùng chung trong tiến trình hiện tại (tạo mới nếu chưa có).
+    """
+    global _client
+    if _client is None:
+        from google import genai
+        _client = genai.Client(api_key=api_key)
+    return _client
+
 def run_gemini(text_content):
     """
     Hàm thực thi Gemini để trích xuất thông tin từ văn bản.
@@ -28,7 +45,8 @@ def run_gemini(text_content):
         return None
 
     try:
-        client = genai.Client(api_key=api_key)
+        from google.genai import types
+        client = get_client()
     except Exception as e:
         print(f"LỖI: Không thể khởi tạo Gemini Client: {e}")
         return None
@@ -149,11 +167,12 @@ def run_gemini(text_content):
         print(f"Trying model: {model_name}")
         for attempt in range(max_retries_per_model):
             try:
-                response = client.models.generate_content(
-                    model=model_name,
-                    contents=prompt,
-                    config=config,
-                )
+                with timed("llm_attempt"):
+                    response = client.models.generate_content(
+                        model=model_name,
+                        contents=prompt,
+                        config=config,
+                    )
                 
                 # --- 6. XỬ LÝ KẾT QUẢ ---
                 # Đầu ra sẽ là một chuỗi JSON hợp lệ
@@ -50,16 +50,17 @@ def format_output(data):
 
     return "\n".join(lines)
 
-def export_result(data, input_file_path, output_dir="Result"):
+def export_result(data, input_file_path, output_dir="Result", output_name=None):
     """
     Exports the data to a .txt file in the output_dir.
-    The filename is based on the input_file_path.
+    The filename is output_name if given (e.g. a unique document id in batch mode),
+    otherwise it is based on the input_file_path.
     """
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
     # Get filename without extension
-    base_name = os.path.splitext(os.path.basename(input_file_path))[0]
+    base_name = output_name or os.path.splitext(os.path.basename(input_file_path))[0]
     output_filename = f"{base_name}.txt"
     output_path = os.path.join(output_dir, output_filename)
 
@@ -0,0 +1,127 @@
+"""
+Hàm dùng chung cho các script benchmark trong thư mục benchmarks/.
+
+Các script được chạy từ thư mục gốc của dự án, ví dụ:
+    python benchmarks/pipeline_bench.py
+"""
+import os
+import sys
+import json
+import glob
+import math
+import difflib
+import unicodedata
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(ROOT_DIR, "test")
+
+
+def setup_paths():
+    """Thêm thư mục gốc và các Module_* vào sys.path (giống pipeline.py)."""
+    paths = [ROOT_DIR] + [os.path.join(ROOT_DIR, f"Module_{i}") for i in range(1, 6)]
+    for path in reversed(paths):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def corpus_files(corpus=DEFAULT_CORPUS, pattern="*.pdf"):
+    """Danh sách file trong corpus, sắp xếp theo số thứ tự (test_2 trước test_10)."""
+    files = glob.glob(os.path.join(corpus, pattern))
+
+    def natural_key(path):
+        name = os.path.basename(path)
+        digits = "".join(c for c in name if c.isdigit())
+        return (int(digits) if digits else 0, name)
+
+    return sorted(files, key=natural_key)
+
+
+def percentile(values, p):
+    """Phân vị p (0-100) với nội suy tuyến tính; None nếu không có dữ liệu."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100.0
+    lower, upper = math.floor(k), math.ceil(k)
+    if lower == upper:
+        return values[int(k)]
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+
+def load_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_json(data, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def higher_is_better(metric):
+    """Metric thông lượng ("..._per_s") càng cao càng tốt; thời gian/bộ nhớ càng thấp càng tốt."""
+    return metric.endswith("_per_s")
+
+
+def compare_with_baseline(current, baseline, threshold=0.2):
+    """
+    So sánh metrics hiện tại với baseline.
+
+    Args:
+        current (dict): {metric: value}
+        baseline (dict): {metric: value}
+        threshold (float): Tỉ lệ thay đổi tối đa cho phép (0.2 = 20%)
+
+    Returns:
+        list: Các dòng mô tả metric bị hồi quy (regression)
+    """
+    regressions = []
+    for metric, base in sorted(baseline.items()):
+        value = current.get(metric)
+        if value is None or not base:
+            continue
+        change = (value - base) / base
+        worse = -change if higher_is_better(metric) else change
+        if worse > threshold:
+            regressions.append(f"{metric}: {base:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def normalize_text(text):
+    """Chuẩn hóa để so sánh văn bản: NFC, chữ thường, gộp khoảng trắng."""
+    return " ".join(unicodedata.normalize("NFC", text or "").lower().split())
+
+
+def char_accuracy(reference, hypothesis):
+    """
+    Độ chính xác ký tự = 1 - CER, với số lỗi ước lượng từ các đoạn khác nhau của
+    difflib (nhanh hơn Levenshtein đầy đủ trên văn bản vài nghìn ký tự).
+    """
+    reference, hypothesis = normalize_text(reference), normalize_text(hypothesis)
+    if not reference:
+        return 1.0 if not hypothesis else 0.0
+    matcher = difflib.SequenceMatcher(None, reference, hypothesis, autojunk=False)
+    errors = sum(max(i2 - i1, j2 - j1) for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal")
+    return max(0.0, 1.0 - errors / len(reference))
+
+
+def print_table(rows, headers):
+    """In bảng đơn giản, cột đầu căn trái, các cột sau căn phải."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) if rows else len(str(h))
+              for i, h in enumerate(headers)]
+    line = "  ".join(f"{h:<{widths[0]}}" if i == 0 else f"{h:>{widths[i]}}" for i, h in enumerate(headers))
+    print(line)
+    print("-" * len(line))
+    for row in rows:
+        print("  ".join(f"{str(v):<{widths[0]}}" if i == 0 else f"{str(v):>{widths[i]}}"
+                        for i, v in enumerate(row)))
+
+
+def fmt(value, digits=3):
+    return "-" if value is None else f"{value:.{digits}f}"
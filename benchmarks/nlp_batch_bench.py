@@ -0,0 +1,83 @@
+"""
+So sánh phân tích Module 2 theo lô (DocumentAnalyzer.analyze_many, nlp.pipe) với
+vòng lặp từng tài liệu (analyze_full).
+
+Văn bản lấy từ corpus (đọc và làm sạch bằng Module 1; PDF quét cần OCR và dùng cache
+OCR ở .cache/ocr). --copies N lặp corpus N lần để có đủ tài liệu cho một lô. Báo
+cáo thời gian, docs/s của hai cách và số tài liệu cho POS tags và entities giống hệt.
+
+Chạy từ thư mục gốc:
+    python benchmarks/nlp_batch_bench.py
+    python benchmarks/nlp_batch_bench.py --copies 10 --batch-size 16 --n-process 2
+"""
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+from bench_utils import setup_paths, corpus_files, print_table, fmt, DEFAULT_CORPUS
+
+setup_paths()
+
+from module1 import DocumentPreprocessor
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+from analyzer import DocumentAnalyzer
+
+
+def summary(result):
+    """Phần so sánh được của một kết quả: POS tags và entities đã merge."""
+    return result['pos_tags'], [(e['text'], e['label'], e['start'], e['end'], e['source'])
+                                for e in result['ner_entities']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched Module 2 analysis benchmark (nlp.pipe)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF/DOCX/TXT")
+    parser.add_argument("--copies", type=int, default=5, help="Lặp corpus N lần")
+    parser.add_argument("--batch-size", type=int, default=8, help="batch_size của nlp.pipe")
+    parser.add_argument("--n-process", type=int, default=1, help="n_process của nlp.pipe")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR (PDF quét)")
+    args = parser.parse_args()
+
+    files = [path for pattern in ("*.pdf", "*.docx", "*.txt") for path in corpus_files(args.corpus, pattern)]
+    if not files:
+        print(f"No documents found in {args.corpus}")
+        return 1
+
+    processor = DocumentPreprocessor(use_gpu=args.gpu, ocr_cache_dir=DEFAULT_OCR_CACHE_DIR)
+    texts = []
+    for path in files:
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor.read(path).clean().segment()
+        texts.append(processor.get_official_text())
+    texts = [t for t in texts if t] * args.copies
+
+    analyzer = DocumentAnalyzer()
+    # Khởi động underthesea và spaCy trước khi đo (analyze_hybrid_ner in rất nhiều)
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer.analyze_full(texts[0])
+
+        start = time.perf_counter()
+        loop_results = [summary(analyzer.analyze_full(t)) for t in texts]
+        loop_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch_results = [summary(r) for r in analyzer.analyze_many(
+            texts, batch_size=args.batch_size, n_process=args.n_process)]
+        batch_s = time.perf_counter() - start
+
+    identical = sum(a == b for a, b in zip(loop_results, batch_results))
+    chars = sum(len(t) for t in texts)
+    rows = [
+        ["per-document loop", len(texts), fmt(loop_s, 2), fmt(len(texts) / loop_s, 2), fmt(chars / loop_s, 0)],
+        [f"analyze_many (batch {args.batch_size}, n_process {args.n_process})", len(texts), fmt(batch_s, 2),
+         fmt(len(texts) / batch_s, 2), fmt(chars / batch_s, 0)],
+    ]
+    print_table(rows, ["mode", "docs", "seconds", "docs/s", "chars/s"])
+    print(f"speedup: {loop_s / batch_s:.2f}x, identical results: {identical}/{len(texts)}")
+    return 0 if identical == len(texts) == len(batch_results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
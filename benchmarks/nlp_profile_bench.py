@@ -0,0 +1,83 @@
+"""
+So sánh độ trễ Module 2 giữa các profile phân tích (Module_2/analyzer.py,
+ANALYSIS_PROFILES; pipeline.py --analysis-profile).
+
+Văn bản lấy từ corpus (đọc và làm sạch bằng Module 1; PDF quét cần OCR và dùng cache
+OCR ở .cache/ocr). Với mỗi profile, báo cáo các component spaCy được nạp, p50/p95
+thời gian parse spaCy và thời gian analyze_shared (POS + Hybrid NER + cú pháp nếu
+có parser) mỗi tài liệu, cùng số tài liệu có entities giống profile đầu tiên.
+
+Chạy từ thư mục gốc:
+    python benchmarks/nlp_profile_bench.py
+    python benchmarks/nlp_profile_bench.py --profiles full fields --repeat 5
+"""
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+from bench_utils import setup_paths, corpus_files, percentile, print_table, fmt, DEFAULT_CORPUS
+
+setup_paths()
+
+from module1 import DocumentPreprocessor
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+from analyzer import DocumentAnalyzer, ANALYSIS_PROFILES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Module 2 analysis profile latency benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF/DOCX/TXT")
+    parser.add_argument("--profiles", nargs="+", choices=list(ANALYSIS_PROFILES), default=list(ANALYSIS_PROFILES))
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi tài liệu")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR (PDF quét)")
+    args = parser.parse_args()
+
+    files = [path for pattern in ("*.pdf", "*.docx", "*.txt") for path in corpus_files(args.corpus, pattern)]
+    if not files:
+        print(f"No documents found in {args.corpus}")
+        return 1
+
+    processor = DocumentPreprocessor(use_gpu=args.gpu, ocr_cache_dir=DEFAULT_OCR_CACHE_DIR)
+    texts = []
+    for path in files:
+        with contextlib.redirect_stdout(io.StringIO()):
+            processor.read(path).clean().segment()
+        texts.append(processor.get_official_text())
+    texts = [t for t in texts if t]
+
+    rows = []
+    reference = None
+    for profile in args.profiles:
+        with contextlib.redirect_stdout(io.StringIO()):
+            analyzer = DocumentAnalyzer(profile=profile)
+            analyzer.analyze_shared(texts[0])  # khởi động underthesea và spaCy
+
+            parse_s, total_s, entities = [], [], []
+            for text in texts:
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    analyzer.nlp(text)
+                    parse_s.append(time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    result = analyzer.analyze_shared(text)
+                    total_s.append(time.perf_counter() - start)
+                entities.append([(e['text'], e['label'], e['start'], e['end']) for e in result['ner_entities']])
+
+        if reference is None:
+            reference = entities
+        same = sum(a == b for a, b in zip(reference, entities))
+        rows.append([profile, ",".join(analyzer.nlp.pipe_names),
+                     fmt(percentile(parse_s, 50) * 1000, 1), fmt(percentile(parse_s, 95) * 1000, 1),
+                     fmt(percentile(total_s, 50) * 1000, 1), fmt(percentile(total_s, 95) * 1000, 1),
+                     f"{same}/{len(texts)}"])
+
+    print_table(rows, ["profile", "components", "parse p50 ms", "parse p95 ms",
+                       "analyze p50 ms", "analyze p95 ms", f"same entities as {args.profiles[0]}"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
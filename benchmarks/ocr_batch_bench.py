@@ -0,0 +1,74 @@
+"""
+So sánh OCR từng ảnh (readtext) với nhận dạng theo batch (Module_1/ocr_batch.py).
+
+Chạy Module 1 (đọc PDF) trên corpus với từng batch size, báo cáo pages/s và số
+tài liệu cho văn bản giống hệt lần chạy readtext.
+
+Chạy từ thư mục gốc:
+    python benchmarks/ocr_batch_bench.py
+    python benchmarks/ocr_batch_bench.py --batch-sizes 16 32 64 --repeat 2
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+from bench_utils import setup_paths, corpus_files, char_accuracy, print_table, fmt, DEFAULT_CORPUS
+
+setup_paths()
+
+import fitz  # PyMuPDF
+from module1 import DocumentPreprocessor
+
+
+def read_corpus(files, batch_size, use_gpu):
+    """Đọc (OCR) mọi file, trả về ({tên file: raw_text}, số giây)."""
+    processor = DocumentPreprocessor(use_gpu=use_gpu, ocr_batch_size=batch_size)
+    texts = {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for path in files:
+            texts[os.path.basename(path)] = processor.read(path).raw_text
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched EasyOCR recognition benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=1, help="Số lần chạy mỗi cấu hình (lấy lần nhanh nhất)")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR")
+    args = parser.parse_args()
+
+    files = corpus_files(args.corpus)
+    if not files:
+        print(f"No PDF files found in {args.corpus}")
+        return 1
+    pages = 0
+    for path in files:
+        with fitz.open(path) as doc:
+            pages += len(doc)
+
+    # Lần đầu: nạp mô hình (không tính)
+    DocumentPreprocessor(use_gpu=args.gpu).preload_ocr()
+
+    rows, reference = [], None
+    for batch_size in [None] + args.batch_sizes:
+        runs = [read_corpus(files, batch_size, args.gpu) for _ in range(args.repeat)]
+        texts = runs[0][0]
+        seconds = min(run[1] for run in runs)
+        if reference is None:
+            reference = texts
+        same = sum(texts[name] == reference[name] for name in texts)
+        accuracy = sum(char_accuracy(reference[name], texts[name]) for name in texts) / len(texts)
+        rows.append(["readtext" if batch_size is None else f"batch {batch_size}", fmt(seconds, 2),
+                     fmt(pages / seconds, 2), f"{same}/{len(texts)}", fmt(accuracy * 100, 2)])
+
+    print_table(rows, ["mode", "seconds", "pages/s", "identical", "char agreement %"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Đo chi phí chuyển ảnh trang sang EasyOCR: bytes (PNG/JPEG) so với mảng NumPy
+trên bộ đệm pixmap (Module_1/ocr_render.py: pixmap_array).
+
+Với mỗi trang của các PDF trong corpus, đo hai nguồn ảnh như trong Module 1:
+- embedded: ảnh nhúng (doc.extract_image -> bytes, hoặc image_pixmap -> mảng)
+- render:   render trang 300 dpi (pix.tobytes("png") -> bytes, hoặc pixmap_array)
+Mỗi cách đo từ lúc lấy ảnh đến khi EasyOCR có ảnh đã decode (utils.reformat_input,
+bước đầu tiên của readtext): CPU time và bộ nhớ Python cấp phát cao nhất
+(tracemalloc; không gồm bộ nhớ pixmap của MuPDF). Không cần mô hình OCR.
+Thêm --ocr để đo cả readtext (cần mô hình EasyOCR).
+
+Chạy từ thư mục gốc:
+    python benchmarks/ocr_input_bench.py
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+
+from bench_utils import setup_paths, corpus_files, percentile, print_table, fmt, DEFAULT_CORPUS
+
+setup_paths()
+
+import fitz  # PyMuPDF
+import numpy as np
+from easyocr.utils import reformat_input
+from ocr_render import image_pixmap, pixmap_array
+
+METHODS = ["embedded.bytes", "embedded.array", "render.png", "render.array"]
+
+
+def page_input(doc, page, method):
+    """Ảnh đưa cho EasyOCR theo từng cách, trả về (input, pixmap cần giữ sống)."""
+    source, kind = method.split(".")
+    if source == "embedded":
+        xref = page.get_images(full=True)[0][0]
+        if kind == "bytes":
+            return doc.extract_image(xref)["image"], None
+        pix = image_pixmap(doc, xref)
+        return pixmap_array(pix), pix
+    pix = page.get_pixmap(dpi=300)
+    if kind == "png":
+        return pix.tobytes("png"), None
+    return pixmap_array(pix), pix
+
+
+def measure(doc, page, method, reader=None):
+    """Trả về (cpu_s, peak_mb, ảnh xám EasyOCR nhận được)."""
+    # Xóa cache ảnh đã decode của MuPDF để lần đo nào cũng decode lại từ đầu
+    fitz.TOOLS.store_shrink(100)
+    tracemalloc.start()
+    start = time.process_time()
+    image, pix = page_input(doc, page, method)
+    _, grey = reformat_input(image)
+    if reader is not None:
+        reader.readtext(image, detail=0, paragraph=True)
+    cpu_s = time.process_time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_s, peak / (1024 * 1024), grey
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR input handoff benchmark (bytes vs NumPy)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đo mỗi trang")
+    parser.add_argument("--ocr", action="store_true", help="Đo cả readtext (cần mô hình EasyOCR)")
+    args = parser.parse_args()
+
+    files = corpus_files(args.corpus)
+    if not files:
+        print(f"No PDF files found in {args.corpus}")
+        return 1
+
+    reader = None
+    if args.ocr:
+        from ocr_readers import get_reader
+        reader = get_reader()
+
+    cpu = {m: [] for m in METHODS}
+    peak = {m: [] for m in METHODS}
+    diffs = {"embedded": [], "render": []}
+    for path in files:
+        with fitz.open(path) as doc:
+            for page in doc:
+                methods = METHODS if page.get_images(full=True) else METHODS[2:]
+                greys = {}
+                for method in methods:
+                    for _ in range(args.repeat):
+                        cpu_s, peak_mb, greys[method] = measure(doc, page, method, reader)
+                        cpu[method].append(cpu_s)
+                        peak[method].append(peak_mb)
+                # Hai cách phải cho EasyOCR cùng một ảnh (JPEG decode có thể lệch +-1)
+                for source in diffs:
+                    old, new = greys.get(f"{source}.bytes", greys.get(f"{source}.png")), greys.get(f"{source}.array")
+                    if old is not None and new is not None and old.shape == new.shape:
+                        diffs[source].append(float(np.abs(old.astype(np.int16) - new.astype(np.int16)).mean()))
+
+    rows = []
+    for method in METHODS:
+        if cpu[method]:
+            rows.append([method, len(cpu[method]), fmt(percentile(cpu[method], 50) * 1000, 1),
+                         fmt(percentile(cpu[method], 95) * 1000, 1), fmt(percentile(peak[method], 50), 1),
+                         fmt(max(peak[method]), 1)])
+    print_table(rows, ["method", "runs", "cpu p50 ms", "cpu p95 ms", "peak MB p50", "peak MB max"])
+    for source, values in diffs.items():
+        if values:
+            print(f"{source}: mean |grey difference| bytes vs array = {sum(values) / len(values):.3f} (0-255)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark các chế độ render trang trước khi OCR (Module_1/ocr_render.py).
+
+Với mỗi chế độ, OCR từng trang của các PDF trong corpus và báo cáo:
+- thời gian OCR mỗi trang (p50/p95) và pages/s
+- độ chính xác ký tự (1 - CER) của cả tài liệu so với văn bản chuẩn
+
+Văn bản chuẩn lấy từ --truth DIR (file <tên pdf>.txt) nếu có; nếu không, kết quả
+của chế độ "native" (ảnh gốc / 300 dpi) được dùng làm chuẩn, nên độ chính xác khi
+đó là độ khớp tương đối so với chế độ mặc định.
+
+Chạy từ thư mục gốc:
+    python benchmarks/ocr_render_bench.py
+    python benchmarks/ocr_render_bench.py --modes native adaptive --truth data/truth
+"""
+import os
+import sys
+import time
+import argparse
+
+from bench_utils import (setup_paths, corpus_files, percentile, save_json, char_accuracy,
+                         print_table, fmt, DEFAULT_CORPUS)
+
+setup_paths()
+
+import fitz  # PyMuPDF
+from module1 import _ocr_page
+from ocr_readers import get_reader
+from ocr_render import RENDER_PRESETS, resolve_render
+
+
+def ocr_document(path, reader, settings):
+    """OCR mọi trang của một PDF, trả về (text, [thời gian từng trang])."""
+    chunks, times = [], []
+    with fitz.open(path) as doc:
+        for page_index in range(len(doc)):
+            start = time.perf_counter()
+            chunks.extend(_ocr_page(doc, page_index, reader, settings))
+            times.append(time.perf_counter() - start)
+    return "\n".join(chunks), times
+
+
+def load_truth(truth_dir, path):
+    if not truth_dir:
+        return None
+    truth_path = os.path.join(truth_dir, os.path.splitext(os.path.basename(path))[0] + ".txt")
+    if not os.path.exists(truth_path):
+        return None
+    with open(truth_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR render mode benchmark over the test/ corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF")
+    parser.add_argument("--modes", nargs="+", default=list(RENDER_PRESETS), choices=list(RENDER_PRESETS))
+    parser.add_argument("--truth", metavar="DIR", help="Thư mục văn bản chuẩn <tên pdf>.txt")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR")
+    parser.add_argument("--save", metavar="FILE", help="Ghi kết quả chi tiết ra JSON")
+    args = parser.parse_args()
+
+    files = corpus_files(args.corpus)
+    if not files:
+        print(f"No PDF files found in {args.corpus}")
+        return 1
+
+    reader = get_reader(gpu=args.gpu)
+    # Chạy một trang trước để mô hình khởi động xong (không tính)
+    with fitz.open(files[0]) as doc:
+        _ocr_page(doc, 0, reader)
+
+    modes = list(args.modes)
+    if "native" not in modes and not args.truth:
+        modes.insert(0, "native")  # cần làm văn bản chuẩn
+
+    outputs = {}
+    for mode in modes:
+        settings = resolve_render(mode)
+        outputs[mode] = {}
+        for path in files:
+            text, times = ocr_document(path, reader, settings)
+            outputs[mode][os.path.basename(path)] = {"text": text, "page_s": times}
+            print(f"{mode:<12} {os.path.basename(path):<14} {len(times):>3} pages {sum(times):>8.2f}s")
+
+    rows, report = [], {}
+    for mode in modes:
+        page_times, accuracies = [], []
+        for path in files:
+            name = os.path.basename(path)
+            result = outputs[mode][name]
+            page_times.extend(result["page_s"])
+            reference = load_truth(args.truth, path)
+            if reference is None:
+                reference = outputs["native"][name]["text"]
+            accuracies.append(char_accuracy(reference, result["text"]))
+        report[mode] = {
+            "settings": resolve_render(mode),
+            "page_p50_s": percentile(page_times, 50),
+            "page_p95_s": percentile(page_times, 95),
+            "pages_per_s": len(page_times) / sum(page_times) if sum(page_times) else None,
+            "char_accuracy": sum(accuracies) / len(accuracies),
+        }
+        rows.append([mode, fmt(report[mode]["page_p50_s"]), fmt(report[mode]["page_p95_s"]),
+                     fmt(report[mode]["pages_per_s"], 2), fmt(report[mode]["char_accuracy"] * 100, 1)])
+
+    print()
+    print_table(rows, ["mode", "p50 s/page", "p95 s/page", "pages/s", "char acc %"])
+    if not args.truth:
+        print("\nchar acc % is measured against the native mode output (no --truth given).")
+
+    if args.save:
+        save_json({"modes": report,
+                   "documents": {mode: {name: r["text"] for name, r in docs.items()}
+                                 for mode, docs in outputs.items()}}, args.save)
+        print(f"Results saved to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
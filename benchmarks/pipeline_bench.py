@@ -0,0 +1,164 @@
+"""
+Benchmark toàn bộ pipeline (Module 1 -> 5) trên corpus test/.
+
+Module 3 (Gemini) được thay bằng phản hồi ghi sẵn (recorded_gemini.py) nên
+benchmark chạy offline và chỉ đo phần xử lý cục bộ.
+
+Báo cáo:
+- p50/p95 thời gian từng module
+- pages/s của Module 1 (OCR/trích xuất text), tokens/s của Module 2
+- RSS cao nhất
+và so sánh với baseline (benchmarks/baseline.json), báo lỗi nếu chậm hơn ngưỡng.
+
+Chạy từ thư mục gốc:
+    python benchmarks/pipeline_bench.py                  # so sánh với baseline
+    python benchmarks/pipeline_bench.py --save-baseline  # ghi baseline mới
+    python benchmarks/pipeline_bench.py --record         # ghi phản hồi Gemini thật (cần API key)
+"""
+import os
+import io
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+from bench_utils import (setup_paths, corpus_files, percentile, load_json, save_json,
+                         compare_with_baseline, print_table, fmt, BENCH_DIR, DEFAULT_CORPUS)
+
+setup_paths()
+
+import fitz  # PyMuPDF
+import pipeline
+from pipeline_metrics import peak_rss_mb
+from recorded_gemini import RecordedGemini
+
+STAGES = ["module_1", "module_2", "module_3", "module_4", "module_5"]
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_RESPONSES = os.path.join(BENCH_DIR, "recorded_responses.json")
+
+
+def page_count(path):
+    if not path.lower().endswith(".pdf"):
+        return 1
+    with fitz.open(path) as doc:
+        return len(doc)
+
+
+def run_document(path, processor, analyzer, extractor, output_dir, verbose=False):
+    """Chạy pipeline cho một file, trả về số liệu đo (ẩn log nếu không verbose)."""
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with sink:
+        ctx = pipeline.process_document(path, processor, analyzer, cache=None,
+                                        extractor=extractor, output_dir=output_dir)
+    steps = ctx.metrics.to_dict()["steps"]
+    tokens = 0
+    if ctx.analysis:
+        tokens = ctx.analysis.get("metadata", {}).get("total_tokens", 0)
+    return {
+        "file": os.path.basename(path),
+        "status": ctx.status,
+        "pages": page_count(path),
+        "tokens": tokens,
+        "stages": {stage: steps[stage]["wall_s"] for stage in STAGES if stage in steps},
+        "total_s": ctx.seconds,
+    }
+
+
+def summarize(records):
+    """Gộp số liệu từng tài liệu thành metrics phẳng {tên: giá trị}."""
+    metrics = {}
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in records if stage in r["stages"]]
+        if values:
+            metrics[f"{stage}.p50_s"] = percentile(values, 50)
+            metrics[f"{stage}.p95_s"] = percentile(values, 95)
+    totals = [r["total_s"] for r in records]
+    metrics["document.p50_s"] = percentile(totals, 50)
+    metrics["document.p95_s"] = percentile(totals, 95)
+
+    m1_time = sum(r["stages"].get("module_1", 0.0) for r in records)
+    if m1_time:
+        metrics["module_1.pages_per_s"] = sum(r["pages"] for r in records) / m1_time
+    m2_time = sum(r["stages"].get("module_2", 0.0) for r in records)
+    if m2_time:
+        metrics["module_2.tokens_per_s"] = sum(r["tokens"] for r in records) / m2_time
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return {k: v for k, v in metrics.items() if v is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark over the test/ corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF")
+    parser.add_argument("--repeat", type=int, default=1, help="Số lần chạy mỗi file")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Số file chạy trước (không tính) để nạp mô hình lười")
+    parser.add_argument("--responses", default=DEFAULT_RESPONSES, help="File phản hồi Gemini ghi sẵn")
+    parser.add_argument("--record", action="store_true", help="Gọi Gemini thật cho văn bản chưa có bản ghi")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Độ trễ giả lập mỗi lần gọi LLM (giây)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần này làm baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Ngưỡng hồi quy (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="Hiện log của pipeline")
+    args = parser.parse_args()
+
+    files = corpus_files(args.corpus)
+    if not files:
+        print(f"No PDF files found in {args.corpus}")
+        return 1
+
+    start = time.perf_counter()
+    processor, analyzer = pipeline.load_models()
+    load_s = time.perf_counter() - start
+    extractor = RecordedGemini(args.responses, record=args.record, latency_s=args.llm_latency)
+
+    with tempfile.TemporaryDirectory(prefix="bench-result-") as output_dir:
+        for path in files[:args.warmup]:
+            run_document(path, processor, analyzer, extractor, output_dir, args.verbose)
+
+        records = []
+        for _ in range(args.repeat):
+            for path in files:
+                record = run_document(path, processor, analyzer, extractor, output_dir, args.verbose)
+                records.append(record)
+                print(f"{record['status'].upper():<6} {record['file']:<14} {record['pages']:>3} pages "
+                      f"{record['total_s']:>8.2f}s")
+
+    if args.record:
+        extractor.save()
+
+    metrics = summarize(records)
+    metrics["startup.load_models_s"] = load_s
+
+    print()
+    rows = []
+    for stage in STAGES + ["document"]:
+        rows.append([stage, fmt(metrics.get(f"{stage}.p50_s")), fmt(metrics.get(f"{stage}.p95_s"))])
+    print_table(rows, ["stage", "p50 (s)", "p95 (s)"])
+    print(f"\nModule 1 throughput : {fmt(metrics.get('module_1.pages_per_s'), 2)} pages/s")
+    print(f"Module 2 throughput : {fmt(metrics.get('module_2.tokens_per_s'), 0)} tokens/s")
+    print(f"Peak RSS            : {fmt(metrics.get('peak_rss_mb'), 0)} MB")
+    print(f"Model load          : {load_s:.2f}s")
+    print(f"Recorded LLM        : {extractor.hits} hits, {extractor.misses} misses (default response)")
+
+    if args.save_baseline:
+        save_json(metrics, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    baseline = load_json(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    regressions = compare_with_baseline(metrics, baseline, args.threshold)
+    if regressions:
+        print(f"\nREGRESSIONS (> {args.threshold:.0%} worse than baseline):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print(f"\nNo regressions above {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
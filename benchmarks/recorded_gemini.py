@@ -0,0 +1,60 @@
+"""
+Thay thế run_gemini bằng phản hồi đã ghi sẵn để benchmark chạy offline.
+
+Phản hồi được lưu theo SHA-256 của văn bản gửi cho Module 3. Văn bản chưa có
+bản ghi nhận phản hồi mặc định ("default") trong file, nên benchmark vẫn đo được
+Module 4/5 khi chưa từng ghi. Dùng record=True để gọi Gemini thật và lưu lại.
+"""
+import time
+import hashlib
+
+from bench_utils import load_json, save_json
+
+
+def text_key(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class RecordedGemini:
+    """
+    Callable cùng chữ ký với run_gemini(text_content).
+    """
+
+    def __init__(self, path, record=False, latency_s=0.0):
+        """
+        Args:
+            path (str): File JSON {"default": {...}, "responses": {sha256: {...}}}
+            record (bool): Gọi Gemini thật cho văn bản chưa có bản ghi và lưu lại
+            latency_s (float): Độ trễ giả lập cho mỗi lần gọi (mô phỏng mạng)
+        """
+        self.path = path
+        self.record = record
+        self.latency_s = latency_s
+        data = load_json(path, default={})
+        self.default = data.get("default")
+        self.responses = data.get("responses", {})
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, text_content):
+        key = text_key(text_content)
+        if key in self.responses:
+            self.hits += 1
+            if self.latency_s:
+                time.sleep(self.latency_s)
+            return dict(self.responses[key])
+
+        self.misses += 1
+        if self.record:
+            from gemini import run_gemini
+            response = run_gemini(text_content)
+            if response:
+                self.responses[key] = response
+            return response
+
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return dict(self.default) if self.default else None
+
+    def save(self):
+        save_json({"default": self.default, "responses": self.responses}, self.path)
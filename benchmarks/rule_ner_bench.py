@@ -0,0 +1,157 @@
+"""
+So sánh rule NER bằng regex (Module_2/rule_ner.py) với EntityRuler của spaCy (Luồng B
+trong hybrid_ner.py).
+
+Trước hết kiểm tra kết quả mong đợi của các câu trong EXPECTED (cả hai chế độ, gồm
+các câu không được có số hiệu như "điều 3 kh - bc"). Sau đó dùng văn bản từ corpus
+(đọc và làm sạch bằng Module 1; PDF quét cần OCR và dùng cache OCR ở .cache/ocr) cùng
+các câu mẫu. Với mỗi văn bản:
+- Kiểm tra tương đương: RuleNER(legacy=True) phải cho cùng entities với EntityRuler
+  (nlp(text) rồi ruler(doc)); các entity khác nhau được in ra.
+- Đo thời gian: EntityRuler sau parse đầy đủ (như pipeline), EntityRuler sau chỉ
+  tokenize (nlp.make_doc) và RuleNER.
+- Đếm entities RuleNER mặc định tìm thêm nhờ các mã mới (tt-bgdđt, qđ-ttg...).
+--scale N nhân văn bản lên N lần để mô phỏng tài liệu dài.
+Trả về mã lỗi 1 nếu có bất kỳ khác biệt nào.
+
+Chạy từ thư mục gốc:
+    python benchmarks/rule_ner_bench.py
+    python benchmarks/rule_ner_bench.py --scale 20
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+from bench_utils import setup_paths, corpus_files, print_table, fmt, DEFAULT_CORPUS
+
+setup_paths()
+
+from module1 import DocumentPreprocessor
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+from analyzer import DocumentAnalyzer
+from hybrid_ner import _parse_ruler_entities
+from rule_ner import RuleNER
+
+# Văn bản đã làm sạch (Module 1) và entities mong đợi:
+# (văn bản, RuleNER(legacy=True), RuleNER())
+EXPECTED = [
+    ("bộ giáo dục và đào tạo số . 2750 qđ - bgdđt hà nội , ngày 14 tháng 7 năm 2025",
+     ["số . 2750 qđ - bgdđt", "ngày 14 tháng 7 năm 2025"],
+     ["số . 2750 qđ - bgdđt", "ngày 14 tháng 7 năm 2025"]),
+    ("căn cứ nghị định số 37 2025 nđ-cp ngày 3 tháng 2 năm 2025 của chính phủ ;",
+     ["số 37 2025 nđ-cp", "ngày 3 tháng 2 năm 2025"],
+     ["số 37 2025 nđ-cp", "ngày 3 tháng 2 năm 2025"]),
+    ("căn cứ nghị định số 63 2010 nđ - cp ngày 8 tháng 6 năm 2010 ;",
+     ["số 63 2010 nđ - cp", "ngày 8 tháng 6 năm 2010"],
+     ["số 63 2010 nđ - cp", "ngày 8 tháng 6 năm 2010"]),
+    ("theo quyết định số 2827/qđ-bgdđt và nghị định số 92/2017/nđ-cp",
+     ["số 2827/qđ-bgdđt", "số 92/2017/nđ-cp"],
+     ["số 2827/qđ-bgdđt", "số 92/2017/nđ-cp"]),
+    ("căn cứ thông tư số 08 2021 tt-bgdđt và quyết định 1234 qđ-ttg ; nghị quyết số 12 nq - cp",
+     [],
+     ["số 08 2021 tt-bgdđt", "1234 qđ-ttg", "số 12 nq - cp"]),
+    # Không pattern nào của ner_patterns.json nhận "nđ - cp" tách rời sau dấu câu
+    ("nghị định số . 37 nđ - cp", [], ["số . 37 nđ - cp"]),
+    # Số trần trước mã có cơ quan ban hành lạ: không phải số hiệu
+    ("theo điều 3 kh - bc của đơn vị", [], []),
+    ("có 2 tb - ct được gửi", [], []),
+    ("kế hoạch 15/kh-ubnd", [], ["15/kh-ubnd"]),
+]
+SAMPLES = [text for text, _, _ in EXPECTED]
+
+
+def best_time(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def keys(entities):
+    return [(e['label'], e['start'], e['end']) for e in entities]
+
+
+def check_expected(legacy, extended):
+    """So entities của RuleNER với EXPECTED, in các câu sai; trả về số câu sai."""
+    failures = 0
+    for text, want_legacy, want_extended in EXPECTED:
+        for mode, ner, want in (("legacy", legacy, want_legacy), ("default", extended, want_extended)):
+            got = [e['text'] for e in ner.extract(text)]
+            if got != want:
+                failures += 1
+                print(f"MISMATCH ({mode}) {text!r}: expected {want}, got {got}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex rule NER vs spaCy EntityRuler benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF/DOCX/TXT")
+    parser.add_argument("--scale", type=int, default=1, help="Nhân văn bản mỗi tài liệu lên N lần")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đo (lấy lần nhanh nhất)")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR (PDF quét)")
+    args = parser.parse_args()
+
+    legacy, extended = RuleNER(legacy=True), RuleNER()
+    failures = check_expected(legacy, extended)
+    print(f"expected entities: {len(EXPECTED) * 2 - failures}/{len(EXPECTED) * 2} checks passed")
+
+    documents = [(f"sample_{i}", text) for i, text in enumerate(SAMPLES, 1)]
+    files = [path for pattern in ("*.pdf", "*.docx", "*.txt") for path in corpus_files(args.corpus, pattern)]
+    if files:
+        processor = DocumentPreprocessor(use_gpu=args.gpu, ocr_cache_dir=DEFAULT_OCR_CACHE_DIR)
+        for path in files:
+            with contextlib.redirect_stdout(io.StringIO()):
+                processor.read(path).clean().segment()
+            documents.append((os.path.basename(path), processor.get_official_text() or ""))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        analyzer = DocumentAnalyzer()
+    nlp, ruler = analyzer.nlp, analyzer.rule_ruler
+
+    rows = []
+    totals = {"parse": 0.0, "tokenize": 0.0, "regex": 0.0}
+    identical = extra = 0
+    for name, text in documents:
+        text = " ".join([text] * args.scale)
+        parse_s, reference = best_time(lambda: _parse_ruler_entities(ruler(nlp(text))), args.repeat)
+        tokenize_s, _ = best_time(lambda: _parse_ruler_entities(ruler(nlp.make_doc(text))), args.repeat)
+        regex_s, entities = best_time(lambda: legacy.extract(text), args.repeat)
+        found = extended.extract(text)
+
+        same = keys(reference) == keys(entities)
+        identical += same
+        extra += len(found) - len(entities)
+        totals["parse"] += parse_s
+        totals["tokenize"] += tokenize_s
+        totals["regex"] += regex_s
+        rows.append([name, len(text), len(reference), len(entities), len(found), fmt(parse_s * 1000, 2),
+                     fmt(tokenize_s * 1000, 2), fmt(regex_s * 1000, 3),
+                     fmt(parse_s / regex_s, 0) if regex_s else "-", "yes" if same else "NO"])
+
+        if not same:
+            print(f"== {name}")
+            for e in reference:
+                if (e['label'], e['start'], e['end']) not in keys(entities):
+                    print(f"  ruler: [{e['label']}] {e['text']}")
+            for e in entities:
+                if (e['label'], e['start'], e['end']) not in keys(reference):
+                    print(f"  regex: [{e['label']}] {e['text']}")
+
+    rows.append(["total", "", "", "", "", fmt(totals["parse"] * 1000, 2), fmt(totals["tokenize"] * 1000, 2),
+                 fmt(totals["regex"] * 1000, 3),
+                 fmt(totals["parse"] / totals["regex"], 0) if totals["regex"] else "-", ""])
+    print_table(rows, ["document", "chars", "ents ruler", "ents regex", "ents regex (all codes)",
+                       "parse+ruler ms", "tokenize+ruler ms", "regex ms", "speedup", "identical"])
+    print(f"identical to EntityRuler (legacy patterns): {identical}/{len(documents)}, "
+          f"extra entities with all codes: {extra}")
+    return 0 if failures == 0 and identical == len(documents) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+So sánh tách câu theo quy tắc (Module_1/sentence_segmenter.py) với sent_tokenize
+của underthesea.
+
+Trước hết kiểm tra cách tách của các câu trong EXPECTED (khoản đánh số sau dấu chấm,
+"số . 2750", "1 . 2"...). Sau đó, với mỗi tài liệu trong corpus (đọc và làm sạch bằng
+Module 1; PDF quét cần OCR và dùng cache OCR ở .cache/ocr) và trong fixtures/segment
+(văn bản .txt, không cần OCR), báo cáo thời gian tách câu của hai cách và độ khớp ranh
+giới câu: precision/recall/F1 của ranh giới "rules" so với sent_tokenize. Ranh giới
+được tính theo vị trí ký tự khác khoảng trắng, nên không phụ thuộc cách strip câu.
+Tài liệu đọc ra văn bản rỗng (PDF quét khi không có EasyOCR) được ghi EMPTY và không
+tính vào tổng. --scale N nhân văn bản lên N lần để mô phỏng tài liệu dài.
+Trả về mã lỗi 1 nếu có câu trong EXPECTED bị tách sai.
+
+Chạy từ thư mục gốc:
+    python benchmarks/segment_bench.py
+    python benchmarks/segment_bench.py --scale 20 --show-diff
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+from bench_utils import setup_paths, corpus_files, print_table, fmt, BENCH_DIR, DEFAULT_CORPUS
+
+setup_paths()
+
+from module1 import DocumentPreprocessor
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+from sentence_segmenter import split_sentences
+
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "segment")
+
+# Văn bản đã làm sạch và các câu "rules" phải tách ra
+EXPECTED = [
+    ("quy định như sau . 1 . khoản một ; 2 . khoản hai . 3 . khoản ba .",
+     ["quy định như sau .", "1 . khoản một ;", "2 . khoản hai .", "3 . khoản ba ."]),
+    ("bộ giáo dục và đào tạo số . 2750 qđ-bgdđt hà nội", ["bộ giáo dục và đào tạo số . 2750 qđ-bgdđt hà nội"]),
+    ("mức chi bằng 1 . 5 lần định mức . điều 2 . hiệu lực",
+     ["mức chi bằng 1 . 5 lần định mức .", "điều 2 .", "hiệu lực"]),
+    ("căn cứ luật ; căn cứ nghị định ; quyết định : điều 1 . nội dung",
+     ["căn cứ luật ;", "căn cứ nghị định ;", "quyết định :", "điều 1 .", "nội dung"]),
+    ("các khoản chi gồm : a ) chi biên soạn ; b ) chi thù lao . nơi nhận : - lưu",
+     ["các khoản chi gồm :", "a ) chi biên soạn ;", "b ) chi thù lao .", "nơi nhận : - lưu"]),
+]
+
+
+def boundaries(sentences):
+    """Tập vị trí kết thúc câu, đếm theo số ký tự khác khoảng trắng từ đầu văn bản."""
+    ends, position = set(), 0
+    for sentence in sentences:
+        position += len("".join(sentence.split()))
+        ends.add(position)
+    return ends
+
+
+def best_time(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def check_expected():
+    """So split_sentences với EXPECTED, in các câu sai; trả về số câu sai."""
+    failures = 0
+    for text, want in EXPECTED:
+        got = split_sentences(text)
+        if got != want:
+            failures += 1
+            print(f"MISMATCH {text!r}: expected {want}, got {got}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rule-based vs underthesea sentence segmentation benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF/DOCX/TXT")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES,
+                        help="Thư mục văn bản .txt mẫu (luôn được đo cùng corpus)")
+    parser.add_argument("--scale", type=int, default=1, help="Nhân văn bản mỗi tài liệu lên N lần")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đo (lấy lần nhanh nhất)")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR (PDF quét)")
+    parser.add_argument("--show-diff", action="store_true", help="In các câu chỉ có ở một cách tách")
+    args = parser.parse_args()
+
+    failures = check_expected()
+    print(f"expected splits: {len(EXPECTED) - failures}/{len(EXPECTED)} checks passed")
+
+    from underthesea import sent_tokenize
+
+    files = [path for pattern in ("*.pdf", "*.docx", "*.txt") for path in corpus_files(args.corpus, pattern)]
+    files += corpus_files(args.fixtures, "*.txt")
+    if not files:
+        print(f"No documents found in {args.corpus} or {args.fixtures}")
+        return 1
+
+    processor = DocumentPreprocessor(use_gpu=args.gpu, ocr_cache_dir=DEFAULT_OCR_CACHE_DIR)
+    sent_tokenize("khởi động underthesea .")  # nạp thư viện trước khi đo
+
+    rows = []
+    totals = {"underthesea": 0.0, "rules": 0.0, "tp": 0, "ref": 0, "hyp": 0}
+    for path in files:
+        with contextlib.redirect_stdout(io.StringIO()):
+            text = processor.read(path).clean().cleaned_text or ""
+        if not text.strip():
+            rows.append([os.path.basename(path), 0, "-", "-", "-", "-", "-", "-", "-", "EMPTY"])
+            continue
+        text = " ".join([text] * args.scale)
+
+        ref_s, reference = best_time(lambda: sent_tokenize(text), args.repeat)
+        rules_s, sentences = best_time(lambda: split_sentences(text), args.repeat)
+        ref_ends, hyp_ends = boundaries(reference), boundaries(sentences)
+        tp = len(ref_ends & hyp_ends)
+        precision = tp / len(hyp_ends) if hyp_ends else 1.0
+        recall = tp / len(ref_ends) if ref_ends else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+
+        totals["underthesea"] += ref_s
+        totals["rules"] += rules_s
+        totals["tp"] += tp
+        totals["ref"] += len(ref_ends)
+        totals["hyp"] += len(hyp_ends)
+        rows.append([os.path.basename(path), len(text), len(reference), len(sentences), fmt(ref_s * 1000, 2),
+                     fmt(rules_s * 1000, 2), fmt(ref_s / rules_s, 1) if rules_s else "-",
+                     fmt(precision, 3), fmt(recall, 3), fmt(f1, 3)])
+
+        if args.show_diff:
+            ref_set = {s.strip() for s in reference}
+            hyp_set = {s.strip() for s in sentences}
+            print(f"== {os.path.basename(path)}")
+            for s in sorted(ref_set - hyp_set):
+                print(f"  underthesea: {s}")
+            for s in sorted(hyp_set - ref_set):
+                print(f"  rules:       {s}")
+
+    precision = totals["tp"] / totals["hyp"] if totals["hyp"] else 1.0
+    recall = totals["tp"] / totals["ref"] if totals["ref"] else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    rows.append(["total", "", totals["ref"], totals["hyp"], fmt(totals["underthesea"] * 1000, 2),
+                 fmt(totals["rules"] * 1000, 2),
+                 fmt(totals["underthesea"] / totals["rules"], 1) if totals["rules"] else "-",
+                 fmt(precision, 3), fmt(recall, 3), fmt(f1, 3)])
+    print_table(rows, ["document", "chars", "sent underthesea", "sent rules", "underthesea ms", "rules ms",
+                       "speedup", "precision", "recall", "F1"])
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
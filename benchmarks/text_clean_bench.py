@@ -0,0 +1,139 @@
+"""
+So sánh bộ làm sạch văn bản biên dịch sẵn (Module_1/text_cleaner.py) với cách làm
+cũ của DocumentPreprocessor (mỗi bước một lượt re.sub, mỗi mục correction_map một
+lượt quét với pattern dựng lại ở mỗi lần gọi).
+
+Với mỗi tài liệu trong corpus (PDF/DOCX/TXT, đọc bằng Module 1, PDF quét cần OCR và
+dùng cache OCR ở .cache/ocr) và trong fixtures/text_clean (văn bản .txt kiểu OCR có
+các lỗi trong ocr_corrections.json, không cần OCR), báo cáo thời gian clean + định
+dạng văn bản hành chính của hai cách và số tài liệu cho kết quả giống hệt. --scale N
+nhân văn bản lên N lần để mô phỏng tài liệu dài.
+
+Trả về mã lỗi 1 nếu có tài liệu cho kết quả khác nhau, hoặc đọc ra văn bản rỗng (vd
+không có EasyOCR cho PDF quét): khi đó tài liệu không được so sánh.
+
+Chạy từ thư mục gốc:
+    python benchmarks/text_clean_bench.py
+    python benchmarks/text_clean_bench.py --scale 50 --repeat 20
+"""
+import io
+import os
+import re
+import sys
+import time
+import argparse
+import contextlib
+import unicodedata
+
+from bench_utils import setup_paths, corpus_files, print_table, fmt, BENCH_DIR, DEFAULT_CORPUS
+
+setup_paths()
+
+DEFAULT_FIXTURES = os.path.join(BENCH_DIR, "fixtures", "text_clean")
+
+from module1 import DocumentPreprocessor
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+
+
+def legacy_clean(text, correction_map):
+    """DocumentPreprocessor.clean_text trước khi có text_cleaner.py."""
+    text = text.lower()
+    text = re.sub(r'(\w+)-\s*\n\s*(\w+)', r'\1\2', text)
+    text = re.sub(r'[\n\r\t]', ' ', text)
+    text = unicodedata.normalize('NFC', text)
+    text = re.sub(r'([.,!?;:()])', r' \1 ', text)
+    text = re.sub(r'[^\w\s.,!?;:()-]+', ' ', text, flags=re.UNICODE)
+    text = text.replace('_', ' ')
+    for old, new in correction_map.items():
+        text = re.sub(r'\b' + re.escape(old) + r'\b', new, text)
+    text = re.sub(r'(độc lập) \d+ (tự do) \d+ (hạnh phúc)', r'\1 \2 \3', text)
+    return " ".join(text.split()).strip()
+
+
+def legacy_format(sentences):
+    """DocumentPreprocessor._format_for_official_document trước khi có text_cleaner.py."""
+    lines = []
+    for s in sentences:
+        s = s.replace("kt", "ký thay")
+        s = s.replace("y nơi nhân", "nơi nhận")
+        s = s.replace("đào tao", "đào tạo")
+        s = s.replace("dào tao", "đào tạo")
+        s = s.replace("quyết định", "QUYẾT ĐỊNH")
+        s = re.sub(r"bộ giáo dục và đào tạo cộng hòa xã hội chủ nghĩa việt nam độc lập\s+2\s+tự do\s+5\s+hanh phúc", "BỘ GIÁO DỤC VÀ ĐÀO TẠO\n CỘNG HÒA XÃ HỘI CHỦ NGHĨA VIỆT NAM\n Độc lập - Tự do - Hạnh phúc", s, flags=re.IGNORECASE)
+        s = re.sub(r'\s*([.,;:()])\s*', r' \1 ', s)
+        s = " ".join(s.split())
+        lines.append(s)
+    return "\n".join(lines)
+
+
+def best_time(func, repeat):
+    """Thời gian nhanh nhất (giây) của func() qua repeat lần, cùng kết quả."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled text cleaning benchmark (Module 1)")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Thư mục chứa file PDF/DOCX/TXT")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES,
+                        help="Thư mục văn bản .txt mẫu (luôn được so sánh cùng corpus)")
+    parser.add_argument("--scale", type=int, default=1, help="Nhân văn bản mỗi tài liệu lên N lần")
+    parser.add_argument("--repeat", type=int, default=10, help="Số lần đo (lấy lần nhanh nhất)")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR (PDF quét)")
+    args = parser.parse_args()
+
+    files = [path for pattern in ("*.pdf", "*.docx", "*.txt") for path in corpus_files(args.corpus, pattern)]
+    files += corpus_files(args.fixtures, "*.txt")
+    if not files:
+        print(f"No documents found in {args.corpus} or {args.fixtures}")
+        return 1
+
+    processor = DocumentPreprocessor(use_gpu=args.gpu, ocr_cache_dir=DEFAULT_OCR_CACHE_DIR)
+    rows = []
+    totals = {"old": 0.0, "new": 0.0}
+    same_clean = same_format = 0
+    empty = []
+    for path in files:
+        with contextlib.redirect_stdout(io.StringIO()):
+            raw_text = processor.read(path).raw_text or ""
+        if not raw_text.strip():
+            # Không có gì để so sánh: không được tính là giống hệt
+            empty.append(os.path.basename(path))
+            rows.append([os.path.basename(path), 0, "-", "-", "-", "EMPTY"])
+            continue
+        raw_text = "\n".join([raw_text] * args.scale)
+
+        old_s, old_clean = best_time(lambda: legacy_clean(raw_text, processor.correction_map), args.repeat)
+        new_s, new_clean = best_time(lambda: processor.clean_text(raw_text), args.repeat)
+        sentences = processor._split_sentences(old_clean)
+        old_fmt_s, old_formatted = best_time(lambda: legacy_format(sentences), args.repeat)
+        new_fmt_s, new_formatted = best_time(lambda: processor._format_for_official_document(sentences),
+                                             args.repeat)
+
+        same_clean += old_clean == new_clean
+        same_format += old_formatted == new_formatted
+        old_total, new_total = old_s + old_fmt_s, new_s + new_fmt_s
+        totals["old"] += old_total
+        totals["new"] += new_total
+        rows.append([os.path.basename(path), len(raw_text), fmt(old_total * 1000, 2), fmt(new_total * 1000, 2),
+                     fmt(old_total / new_total, 2) if new_total else "-",
+                     "yes" if old_clean == new_clean and old_formatted == new_formatted else "NO"])
+
+    rows.append(["total", "", fmt(totals["old"] * 1000, 2), fmt(totals["new"] * 1000, 2),
+                 fmt(totals["old"] / totals["new"], 2) if totals["new"] else "-", ""])
+    print_table(rows, ["document", "chars", "old ms", "new ms", "speedup", "identical"])
+    compared = len(files) - len(empty)
+    print(f"identical cleaned text: {same_clean}/{compared}, identical official text: {same_format}/{compared}")
+    if empty:
+        print(f"FAILED: {len(empty)}/{len(files)} documents yielded no text and were not compared "
+              f"(OCR unavailable?): {', '.join(empty)}")
+    return 0 if not empty and same_clean == same_format == compared else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
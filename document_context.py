@@ -0,0 +1,124 @@
+"""
+Ngữ cảnh tài liệu truyền qua các stage của pipeline (trong bộ nhớ).
+
+Thay cho việc ghi processed_document.txt rồi đọc lại, và ghi đè
+Module_2/Output/module_2_output.json: văn bản, kết quả phân tích và kết quả
+trích xuất được giữ trên DocumentContext. File trung gian chỉ được ghi khi có
+artifact_dir, và nằm trong thư mục riêng của từng tài liệu.
+"""
+import os
+import json
+import time
+import hashlib
+from contextlib import contextmanager
+
+from pipeline_metrics import DocumentMetrics
+
+
+class DocumentContext:
+    """
+    Trạng thái của một tài liệu khi đi qua Module 1 -> 5.
+
+    Attributes:
+        input_file (str): Đường dẫn file đầu vào
+        doc_id (str): Định danh duy nhất (tên file + hash đường dẫn)
+        text (str): Văn bản hành chính đã xử lý (Module 1)
+        analysis (dict): JSON phân tích NLP (Module 2)
+        extraction (dict): Kết quả trích xuất từ LLM (Module 3)
+        result (dict): Kết quả đã kiểm tra & chuẩn hóa (Module 4)
+        output_path (str): File kết quả đã xuất (Module 5)
+        cache_keys (dict): Khóa cache từng stage (nếu dùng StageCache)
+        metrics (DocumentMetrics): Thời gian/tài nguyên từng stage
+        stages (dict): Trạng thái từng stage, vd {"module_1": "done", "module_3": "failed"}
+        status (str): "pending" | "ok" | "failed"
+        error (str): Mô tả lỗi nếu thất bại
+    """
+
+    def __init__(self, input_file, artifact_dir=None):
+        """
+        Args:
+            input_file (str): Đường dẫn file đầu vào
+            artifact_dir (str, optional): Thư mục gốc để ghi file trung gian;
+                None để không ghi file nào
+        """
+        self.input_file = input_file
+        base_name = os.path.splitext(os.path.basename(input_file))[0]
+        path_hash = hashlib.sha1(os.path.abspath(input_file).encode("utf-8")).hexdigest()[:8]
+        self.doc_id = f"{base_name}-{path_hash}"
+        self.artifact_dir = os.path.join(artifact_dir, self.doc_id) if artifact_dir else None
+
+        self.text = None
+        self.analysis = None
+        self.extraction = None
+        self.result = None
+        self.output_path = None
+        self.cache_keys = None
+        # Số trang quét Module 1 bỏ qua (ocr_scope="fields"), lưu cùng cache Module 1;
+        # None nếu không biết (mục cache cũ)
+        self.skipped_pages = None
+        self.metrics = DocumentMetrics(self.doc_id, input_file)
+        self.stages = {}
+
+        self.status = "pending"
+        self.error = None
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def ensure_artifact_dir(self):
+        """Tạo (nếu cần) và trả về thư mục artifact của tài liệu, hoặc None."""
+        if self.artifact_dir:
+            os.makedirs(self.artifact_dir, exist_ok=True)
+        return self.artifact_dir
+
+    def artifact_path(self, name):
+        """Đường dẫn file trung gian `name` của tài liệu, hoặc None nếu không ghi artifact."""
+        artifact_dir = self.ensure_artifact_dir()
+        return os.path.join(artifact_dir, name) if artifact_dir else None
+
+    def write_artifact(self, name, content):
+        """
+        Ghi file trung gian (str ghi nguyên văn, dict/list ghi dạng JSON).
+
+        Returns:
+            str hoặc None: Đường dẫn đã ghi
+        """
+        path = self.artifact_path(name)
+        if path is None or content is None:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            if isinstance(content, str):
+                f.write(content)
+            else:
+                json.dump(content, f, indent=2, ensure_ascii=False)
+        return path
+
+    @contextmanager
+    def stage(self, name):
+        """Ghi trạng thái một stage: 'done' khi chạy xong, 'failed' nếu có exception."""
+        self.stages[name] = "running"
+        try:
+            yield
+        except Exception:
+            self.stages[name] = "failed"
+            raise
+        self.stages[name] = "done"
+
+    def finish(self, status, error=None):
+        """Đánh dấu tài liệu đã xử lý xong."""
+        self.status = status
+        self.error = error
+        self.seconds = time.perf_counter() - self.start
+        return self
+
+    def summary(self):
+        """Tóm tắt trạng thái (dict thuần, có thể pickle giữa các tiến trình)."""
+        return {
+            "file": self.input_file,
+            "doc_id": self.doc_id,
+            "status": self.status,
+            "error": self.error,
+            "seconds": self.seconds if self.seconds is not None else time.perf_counter() - self.start,
+            "output_path": self.output_path,
+            "stages": dict(self.stages),
+            "metrics": self.metrics.to_dict(),
+        }
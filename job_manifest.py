@@ -0,0 +1,110 @@
+"""
+Manifest của một lượt chạy batch (SQLite), dùng để chạy tiếp khi batch bị dừng.
+
+Mỗi tài liệu có một dòng: trạng thái chung, trạng thái từng stage, file kết quả và
+lỗi. Khi chạy lại với cùng manifest, tài liệu đã "ok" được bỏ qua; tài liệu còn
+lại chạy lại và các stage đã xong được lấy từ StageCache, nên chỉ stage bị lỗi
+(vd Module 3 hết quota Gemini) hoặc chưa chạy tới mới thực sự chạy lại.
+"""
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    file TEXT PRIMARY KEY,
+    doc_id TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    stages TEXT NOT NULL DEFAULT '{}',
+    output_path TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT
+)
+"""
+
+
+class JobManifest:
+    """
+    Lưu trạng thái từng tài liệu của một batch vào file SQLite.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Đường dẫn file manifest (.sqlite)
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Kết quả được ghi từ thread chính (batch) hoặc các thread stage (staged)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def register(self, files):
+        """Thêm các tài liệu chưa có trong manifest với trạng thái 'pending'."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO documents (file, updated_at) VALUES (?, ?)",
+                [(os.path.abspath(f), _now()) for f in files],
+            )
+            self._conn.commit()
+
+    def pending(self, files):
+        """Lọc ra các tài liệu chưa xử lý thành công (giữ nguyên thứ tự)."""
+        with self._lock:
+            done = {row[0] for row in self._conn.execute(
+                "SELECT file FROM documents WHERE status = 'ok'")}
+        return [f for f in files if os.path.abspath(f) not in done]
+
+    def record(self, summary):
+        """
+        Ghi kết quả một tài liệu.
+
+        Args:
+            summary (dict): DocumentContext.summary()
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO documents (file, doc_id, status, stages, output_path, error, attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+                ON CONFLICT(file) DO UPDATE SET
+                    doc_id = excluded.doc_id,
+                    status = excluded.status,
+                    stages = excluded.stages,
+                    output_path = excluded.output_path,
+                    error = excluded.error,
+                    attempts = documents.attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    os.path.abspath(summary["file"]),
+                    summary.get("doc_id"),
+                    summary["status"],
+                    json.dumps(summary.get("stages") or {}),
+                    summary.get("output_path"),
+                    summary.get("error"),
+                    _now(),
+                ),
+            )
+            self._conn.commit()
+
+    def counts(self):
+        """Số tài liệu theo trạng thái, vd {"ok": 8, "failed": 2}."""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM documents GROUP BY status"))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
@@ -2,6 +2,18 @@ import os
 import sys
 import glob
 import json
+import time
+
+# Mốc thời gian bắt đầu tiến trình, dùng để đo chi phí khởi động (import + load model)
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import contextlib
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 # Add modules to path
 sys.path.append(os.path.join(os.getcwd(), 'Module_1'))
@@ -19,21 +31,32 @@ except ImportError as e:
 
 # Import Module 2
 try:
-    from Module_2.analyzer import DocumentAnalyzer
-    from Module_2.syntax_parsing import analyze_dependency_parsing
-    from Module_2.json_serializer import serialize_full_analysis_to_json, save_json_output
-    import spacy
+    from Module_2.analyzer import DocumentAnalyzer, ANALYSIS_PROFILES
+    from Module_2.json_serializer import serialize_full_analysis_to_json
 except ImportError as e:
     print(f"Error importing Module 2: {e}")
     sys.exit(1)
 
 # Import Module 3
 try:
-    from Module_3.gemini import run_gemini
+    from Module_3.gemini import run_gemini, get_client
 except ImportError as e:
     print(f"Error importing Module 3: {e}")
     sys.exit(1)
 
+from stage_cache import StageCache, cached_stage, DEFAULT_CACHE_DIR
+from document_context import DocumentContext
+from pipeline_metrics import recording, timed, write_jsonl, to_prometheus
+from job_manifest import JobManifest
+from ocr_readers import preload_reader
+from ocr_render import RENDER_PRESETS
+from ocr_cache import DEFAULT_OCR_CACHE_DIR
+from ocr_zones import OCR_SCOPES
+from sentence_segmenter import SEGMENTERS
+
+# Filter for likely test files (txt, pdf, docx, images)
+VALID_EXTENSIONS = ['.txt', '.pdf', '.docx', '.png', '.jpg', '.jpeg']
+
 def select_test_file():
     """Select a file from the test directory."""
     test_dir = 'test'
@@ -42,9 +65,7 @@ def select_test_file():
         return None
 
     files = glob.glob(os.path.join(test_dir, '*.*'))
-    # Filter for likely test files (txt, pdf, docx, images)
-    valid_extensions = ['.txt', '.pdf', '.docx', '.png', '.jpg', '.jpeg']
-    files = [f for f in files if os.path.splitext(f)[1].lower() in valid_extensions]
+    files = [f for f in files if os.path.splitext(f)[1].lower() in VALID_EXTENSIONS]
 
     if not files:
         print(f"No files found in '{test_dir}'.")
@@ -78,101 +99,249 @@ except ImportError as e:
     print(f"Error importing Module 5: {e}")
     sys.exit(1)
 
-def main():
-    # 1. Select File
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-        if not os.path.exists(input_file):
-            print(f"File not found: {input_file}")
-            return
-    else:
-        input_file = select_test_file()
-    
-    if not input_file:
-        print("Exiting.")
-        return
+def load_models(use_gpu=False, analysis_profile="full", **processor_options):
+    """
+    Khởi tạo các mô hình nặng (EasyOCR, spaCy) một lần để dùng lại cho nhiều tài liệu.
 
-    print(f"\nSelected file: {input_file}")
-    
-    # Output file for Module 1
-    processed_text_file = "processed_document.txt"
+    Args:
+        use_gpu (bool): Dùng GPU cho EasyOCR nếu có
+        analysis_profile (str): Profile phân tích Module 2 (xem ANALYSIS_PROFILES)
+        **processor_options: Tham số thêm cho DocumentPreprocessor (ocr_workers,
+            ocr_render, ocr_batch_size, stream_pages...)
 
-    # --- RUN MODULE 1 ---
+    Returns:
+        tuple: (processor, analyzer)
+    """
+    processor = DocumentPreprocessor(use_gpu=use_gpu, **processor_options)
+    analyzer = DocumentAnalyzer(profile=analysis_profile)
+    return processor, analyzer
+
+
+# Các thư viện nặng chỉ nên được import khi thực sự cần (OCR, NER, gọi LLM)
+HEAVY_MODULES = ["torch", "easyocr", "underthesea", "google.genai"]
+
+
+def startup_report(budget_s=None):
+    """
+    In thời gian khởi động tính từ lúc import pipeline và các thư viện nặng đã được nạp.
+
+    Args:
+        budget_s (float, optional): Ngân sách khởi động; in cảnh báo nếu vượt quá
+
+    Returns:
+        float: Thời gian khởi động (giây)
+    """
+    elapsed = time.perf_counter() - _PROCESS_START
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+    print(f"Startup: {elapsed:.2f}s (heavy modules loaded: {', '.join(loaded) or 'none'})")
+    if budget_s is not None and elapsed > budget_s:
+        print(f"Warning: Startup exceeded budget of {budget_s:.1f}s")
+    return elapsed
+
+
+def run_module_1(processor, ctx):
+    """Chạy Module 1 và trả về văn bản hành chính đã xử lý (giữ trong bộ nhớ)."""
+    if processor.stream_pages:
+        # Đọc/OCR, làm sạch, tách câu và định dạng từng trang: không giữ raw_text,
+        # cleaned_text hay danh sách câu của cả tài liệu, chỉ các dòng đã định dạng
+        # (Module 2/3 cần cả văn bản). Các dòng được ghi ngay vào artifact khi có, nên
+        # theo dõi được tiến độ của tài liệu dài
+        lines = []
+        path = ctx.artifact_path("processed_document.txt")
+        with timed("stream"), (open(path, "w", encoding="utf-8") if path else contextlib.nullcontext()) as f:
+            for line in processor.iter_official_lines(ctx.input_file):
+                lines.append(line)
+                if f:
+                    f.write(line + "\n")
+        ctx.write_artifact("page_report.json", processor.page_report or None)
+        ctx.skipped_pages = 0  # iter_pages luôn đọc mọi trang
+        print("Module 1 completed.")
+        return "\n".join(lines)
+
+    # DocumentPreprocessor.read() handles different types but let's be sure
+    with timed("read"):
+        processor.read(ctx.input_file)
+    # PDF: trang nào đọc bằng text layer, trang nào phải OCR
+    ctx.write_artifact("page_report.json", processor.page_report or None)
+    ctx.skipped_pages = sum(page["method"] == "skipped" for page in processor.page_report)
+    with timed("clean"):
+        processor.clean()
+    with timed("segment"):
+        processor.segment()
+    text = processor.get_official_text()
+    print("Module 1 completed.")
+    return text
+
+
+def run_module_2(analyzer, ctx):
+    """Chạy Module 2 (POS, Hybrid NER, Dependency Parsing) và trả về JSON phân tích."""
+    raw_text = ctx.text
+    # POS, Hybrid NER và Dependency Parsing dùng chung một lần parse spaCy
+    print(f"Running POS Tagging, NER and Dependency Parsing (shared spaCy Doc, profile: {analyzer.profile})...")
+    if not (analyzer.nlp and 'parser' in analyzer.nlp.pipe_names):
+        print("Skipping Dependency Parsing...")
+    # HTML trực quan hóa chỉ được ghi khi có thư mục artifact của tài liệu
+    result = analyzer.analyze_shared(raw_text, output_dir=ctx.ensure_artifact_dir())
+    doc_hybrid = result['doc']
+    pos_doc, pos_tags = doc_hybrid, result['pos_tags']
+    dep_doc = result['dep_doc']
+
+    # Export JSON
+    print("Exporting JSON...")
+    json_data = serialize_full_analysis_to_json(
+        pos_doc=pos_doc,
+        pos_tags=pos_tags,
+        ner_doc=doc_hybrid, # Use doc_hybrid for ner_doc placeholder
+        dep_doc=dep_doc,
+        hybrid_doc=doc_hybrid,
+        raw_text=raw_text,
+        stats=analyzer.get_stats(), # analyzer.get_stats() might not exist if not implemented in DocumentAnalyzer
+        file_name=os.path.basename(ctx.input_file)
+    )
+
+    print("Module 2 completed.")
+    return json_data
+
+
+def print_banner(title):
     print("\n" + "=" * 50)
-    print("RUNNING MODULE 1 (Preprocessing & OCR)")
+    print(title)
     print("=" * 50)
-    
+
+
+def cache_keys(cache, input_file, processor, analyzer):
+    """Tính khóa cache các stage cho một tài liệu (None nếu không dùng cache)."""
+    if cache is None:
+        return None
     try:
-        processor = DocumentPreprocessor(use_gpu=False) # Set use_gpu=True if available
-        # Check file type
-        ext = os.path.splitext(input_file)[1].lower()
-        
-        # DocumentPreprocessor.read() handles different types but let's be sure
-        processor.read(input_file).clean().segment()
-        processor.save_as_official_txt(processed_text_file)
-        print(f"Module 1 completed. Output saved to: {processed_text_file}")
-        
-        # Read the processed text for next steps
-        with open(processed_text_file, 'r', encoding='utf-8') as f:
-            raw_text = f.read()
-            
+        return cache.document_keys(input_file, {
+            "module_1": processor.output_config() if processor else None,
+            "module_2": analyzer.output_config() if analyzer else None,
+        })
+    except OSError as e:
+        print(f"Warning: Cannot compute cache keys for {input_file}: {e}")
+        return None
+
+
+def _cached_module_1(cache, ctx, processor):
+    """
+    Module 1 qua cache, trả về (văn bản, số trang bỏ qua).
+
+    Số trang bỏ qua được lưu cùng văn bản để lần chạy lấy từ cache vẫn biết có cần
+    OCR lại cả tài liệu hay không (xem process_document).
+    """
+    def compute():
+        text = run_module_1(processor, ctx)
+        return {"text": text, "skipped_pages": ctx.skipped_pages} if text else None
+
+    value = cached_stage(cache, "module_1", ctx.cache_keys, compute)
+    if value is None:
+        return None, ctx.skipped_pages
+    if isinstance(value, str):  # Mục cache cũ chỉ có văn bản
+        return value, None
+    return value["text"], value["skipped_pages"]
+
+
+def stage_preprocess(ctx, processor, cache=None):
+    """Module 1: ctx.text. Ghi artifact processed_document.txt nếu được yêu cầu."""
+    with recording(ctx.metrics), timed("module_1"), ctx.stage("module_1"):
+        ctx.text, ctx.skipped_pages = _cached_module_1(cache, ctx, processor)
+    path = ctx.write_artifact("processed_document.txt", ctx.text)
+    if path:
+        print(f"Saved: {path}")
+
+
+def stage_analyze(ctx, analyzer, cache=None):
+    """Module 2: ctx.analysis. Ghi artifact module_2_output.json nếu được yêu cầu."""
+    with recording(ctx.metrics), timed("module_2"), ctx.stage("module_2"):
+        ctx.analysis = cached_stage(cache, "module_2", ctx.cache_keys, lambda: run_module_2(analyzer, ctx))
+    path = ctx.write_artifact("module_2_output.json", ctx.analysis)
+    if path:
+        print(f"Saved: {path}")
+
+
+def stage_extract(ctx, cache=None, extractor=None):
+    """
+    Module 3: ctx.extraction (dict từ Gemini, None nếu thất bại).
+    extractor thay cho run_gemini nếu được truyền vào (vd bản ghi sẵn khi benchmark offline).
+    """
+    extractor = extractor or run_gemini
+    with recording(ctx.metrics), timed("module_3"), ctx.stage("module_3"):
+        ctx.extraction = cached_stage(cache, "module_3", ctx.cache_keys, lambda: extractor(ctx.text))
+    if not ctx.extraction:
+        # run_gemini trả về None (vd hết quota với mọi model) thay vì raise
+        ctx.stages["module_3"] = "failed"
+    ctx.write_artifact("module_3_output.json", ctx.extraction)
+
+
+def stage_finalize(ctx, cache=None, output_dir="Result", unique_output=False):
+    """
+    Module 4 + 5: ctx.result và ctx.output_path (file xuất trong output_dir).
+    unique_output: đặt tên file theo ctx.doc_id thay vì tên file đầu vào (chế độ batch,
+    tránh các file cùng tên ở thư mục khác nhau ghi đè nhau).
+    """
+    with recording(ctx.metrics):
+        with timed("module_4"), ctx.stage("module_4"):
+            ctx.result = cached_stage(cache, "module_4", ctx.cache_keys, lambda: run_module_4(ctx.extraction))
+        ctx.write_artifact("module_4_output.json", ctx.result)
+        with timed("module_5"), ctx.stage("module_5"):
+            ctx.output_path = export_result(ctx.result, ctx.input_file, output_dir=output_dir,
+                                            output_name=ctx.doc_id if unique_output else None)
+
+
+def process_document(input_file, processor, analyzer, artifact_dir=None, cache=None,
+                     extractor=None, output_dir="Result", unique_output=False):
+    """
+    Chạy toàn bộ pipeline (Module 1 -> 5) cho một tài liệu.
+
+    Args:
+        input_file (str): Đường dẫn file đầu vào
+        processor: DocumentPreprocessor đã khởi tạo
+        analyzer: DocumentAnalyzer đã khởi tạo
+        artifact_dir (str, optional): Thư mục gốc để ghi file trung gian; mỗi
+            tài liệu có thư mục con riêng. None để chỉ giữ dữ liệu trong bộ nhớ
+        cache (StageCache, optional): Cache kết quả từng stage
+        extractor (callable, optional): Hàm thay cho run_gemini ở Module 3
+        output_dir (str): Thư mục xuất kết quả của Module 5
+        unique_output (bool): Đặt tên file kết quả theo doc_id (xem stage_finalize)
+
+    Returns:
+        DocumentContext: Ngữ cảnh tài liệu (ctx.result là kết quả Module 4)
+    """
+    ctx = DocumentContext(input_file, artifact_dir=artifact_dir)
+    ctx.cache_keys = cache_keys(cache, input_file, processor, analyzer)
+
+    def retry_full_ocr(reason, message):
+        # Chế độ chỉ OCR vùng chứa trường: vùng OCR bỏ sót trường (văn bản rỗng, Module 3
+        # không trích xuất được, Module 4 không hợp lệ) thì OCR lại cả tài liệu, nhưng chỉ
+        # khi thực sự có trang bị bỏ qua (không có thì OCR lại cũng ra cùng văn bản và chỉ
+        # tốn thêm một lần gọi LLM)
+        if not (getattr(processor, "ocr_scope", "full") == "fields"
+                and isinstance(ctx.skipped_pages, int) and ctx.skipped_pages > 0):
+            return None
+        print(f"{message} with fields-only OCR, retrying with full OCR...")
+        return process_document_full_ocr(input_file, processor, analyzer, reason=reason,
+                                         artifact_dir=artifact_dir, cache=cache, extractor=extractor,
+                                         output_dir=output_dir, unique_output=unique_output)
+
+    # --- RUN MODULE 1 ---
+    print_banner("RUNNING MODULE 1 (Preprocessing & OCR)")
+
+    try:
+        stage_preprocess(ctx, processor, cache)
     except Exception as e:
         print(f"Error in Module 1: {e}")
-        return
+        return ctx.finish("failed", f"Module 1: {e}")
+    if not (ctx.text or "").strip():
+        retried = retry_full_ocr("empty_text", "Module 1 returned no text")
+        if retried:
+            return retried
 
     # --- RUN MODULE 2 ---
-    print("\n" + "=" * 50)
-    print("RUNNING MODULE 2 (NLP Analysis)")
-    print("=" * 50)
-    
+    print_banner("RUNNING MODULE 2 (NLP Analysis)")
+
     try:
-        analyzer = DocumentAnalyzer()
-        try:
-            nlp = spacy.load("vi_core_news_lg")
-        except OSError:
-            print("Warning: Model 'vi_core_news_lg' not found. Dependency parsing will be skipped.")
-            print("Try installing it or using a different model.")
-            nlp = None
-        
-        # Run analysis
-        print("Running POS Tagging...")
-        pos_doc, pos_tags = analyzer.analyze_pos(raw_text)
-        
-        print("Running NER...")
-        # analyze_ner returns (doc_hybrid, entities)
-        ner_result = analyzer.analyze_ner(raw_text) 
-        if isinstance(ner_result, tuple):
-            doc_hybrid, entities = ner_result
-        else:
-            doc_hybrid = ner_result
-            entities = [] # Should not happen based on code
-        
-        dep_doc = None
-        # Use analyzer.nlp instead of loading again, as analyzer handles fallback
-        if analyzer.nlp and 'parser' in analyzer.nlp.pipe_names:
-            print("Running Dependency Parsing...")
-            dep_doc = analyze_dependency_parsing(analyzer.nlp, raw_text, output_dir="Module_2")
-        else:
-            print("Skipping Dependency Parsing...")
-            dep_doc = None 
-        
-        # Export JSON
-        print("Exporting JSON...")
-        json_data = serialize_full_analysis_to_json(
-            pos_doc=pos_doc,
-            pos_tags=pos_tags,
-            ner_doc=doc_hybrid, # Use doc_hybrid for ner_doc placeholder
-            dep_doc=dep_doc,
-            hybrid_doc=doc_hybrid,
-            raw_text=raw_text,
-            stats=analyzer.get_stats(), # analyzer.get_stats() might not exist if not implemented in DocumentAnalyzer
-            file_name=os.path.basename(input_file)
-        )
-        
-        module2_output_path = os.path.join("Module_2", "Output", "module_2_output.json")
-        save_json_output(json_data, module2_output_path)
-        print(f"Module 2 completed. Output saved to: {module2_output_path}")
-        
+        stage_analyze(ctx, analyzer, cache)
     except Exception as e:
         print(f"Error in Module 2: {e}")
         # Continue to Module 3 even if Module 2 fails? 
@@ -180,43 +349,484 @@ def main():
         print("Proceeding to Module 3 with raw text...")
 
     # --- RUN MODULE 3 ---
-    print("\n" + "=" * 50)
-    print("RUNNING MODULE 3 (LLM Extraction)")
-    print("=" * 50)
-    
+    print_banner("RUNNING MODULE 3 (LLM Extraction)")
+
     try:
         # Module 3 uses the text content
-        result = run_gemini(raw_text)
-        
-        if result:
-            print("\n" + "=" * 50)
-            print("FINAL RESULT (MODULE 3 OUTPUT)")
-            print("=" * 50)
-            print(json.dumps(result, indent=4, ensure_ascii=False))
+        stage_extract(ctx, cache, extractor=extractor)
+
+        if ctx.extraction:
+            print_banner("FINAL RESULT (MODULE 3 OUTPUT)")
+            print(json.dumps(ctx.extraction, indent=4, ensure_ascii=False))
         else:
             print("Module 3 failed to generate result.")
-            return
+            return (retry_full_ocr("no_extraction", "Module 3 returned no result")
+                    or ctx.finish("failed", "Module 3 failed to generate result"))
     except Exception as e:
         print(f"Error in Module 3: {e}")
-        return
-    # --- RUN MODULE 4 ---
-    print("\n" + "=" * 50)
-    print("RUNNING MODULE 4 (Validation & Post-processing)")
-    print("=" * 50)
+        # Lỗi gọi LLM (mạng, cấu hình) không do OCR theo vùng: không OCR lại
+        return ctx.finish("failed", f"Module 3: {e}")
 
-    final_result = run_module_4(result)
+    # --- RUN MODULE 4 & 5 ---
+    print_banner("RUNNING MODULE 4 (Validation & Post-processing) & MODULE 5 (Export Result)")
 
-    print("\n" + "=" * 50)
-    print("FINAL RESULT (MODULE 4 OUTPUT)")
-    print("=" * 50)
-    print(json.dumps(final_result, indent=4, ensure_ascii=False))
+    stage_finalize(ctx, cache, output_dir=output_dir, unique_output=unique_output)
 
-    # --- RUN MODULE 5 ---
-    print("\n" + "=" * 50)
-    print("RUNNING MODULE 5 (Export Result)")
-    print("=" * 50)
+    if not ctx.result.get("is_valid"):
+        retried = retry_full_ocr("invalid", f"Validation failed ({'; '.join(ctx.result.get('errors', []))})")
+        if retried:
+            return retried
+
+    print_banner("FINAL RESULT (MODULE 4 OUTPUT)")
+    print(json.dumps(ctx.result, indent=4, ensure_ascii=False))
+    print(f"\nResult exported to: {ctx.output_path}")
+    return ctx.finish("ok")
+
+
+def process_document_full_ocr(input_file, processor, analyzer, reason="invalid", **kwargs):
+    """
+    process_document với processor tạm chuyển sang OCR toàn bộ tài liệu (ocr_scope="full").
+
+    reason (lý do lần OCR theo vùng thất bại: "empty_text", "no_extraction", "invalid")
+    được ghi vào ctx.stages["fields_ocr"].
+    """
+    scope = processor.ocr_scope
+    processor.ocr_scope = "full"
+    try:
+        ctx = process_document(input_file, processor, analyzer, **kwargs)
+    finally:
+        processor.ocr_scope = scope
+    ctx.stages["fields_ocr"] = reason
+    return ctx
+
+
+# -------- Batch mode --------
+# Mỗi tiến trình worker giữ bộ mô hình riêng (DocumentPreprocessor,
+# DocumentAnalyzer, Gemini client) và dùng lại cho mọi tài liệu nó nhận.
+_worker_processor = None
+_worker_analyzer = None
+_worker_cache = None
+
+
+def collect_batch_inputs(source):
+    """
+    Lấy danh sách file đầu vào từ một thư mục hoặc một glob pattern.
+
+    Args:
+        source (str): Thư mục (vd: "test") hoặc glob (vd: "data/**/*.pdf")
+
+    Returns:
+        list: Danh sách đường dẫn file đã sắp xếp
+    """
+    if os.path.isdir(source):
+        files = glob.glob(os.path.join(source, '*.*'))
+    else:
+        files = glob.glob(source, recursive=True)
+    files = [f for f in files if os.path.isfile(f) and os.path.splitext(f)[1].lower() in VALID_EXTENSIONS]
+    return sorted(files)
+
+
+def _init_worker(use_gpu, cache_config, processor_options=None):
+    global _worker_processor, _worker_analyzer, _worker_cache
+    _worker_processor, _worker_analyzer = load_models(use_gpu=use_gpu, **(processor_options or {}))
+    if cache_config:
+        _worker_cache = StageCache(**cache_config)
+    try:
+        get_client()
+    except Exception as e:
+        # run_gemini sẽ báo lỗi cấu hình khi xử lý tài liệu
+        print(f"Warning: Cannot create Gemini client in worker: {e}")
+
+
+def _process_in_worker(input_file, artifact_dir):
+    try:
+        ctx = process_document(input_file, _worker_processor, _worker_analyzer,
+                               artifact_dir=artifact_dir, cache=_worker_cache, unique_output=True)
+    except Exception as e:
+        ctx = DocumentContext(input_file).finish("failed", str(e))
+    return ctx.summary()
+
+
+def run_batch(input_files, workers=1, use_gpu=False, artifact_dir=None, cache_config=None,
+              on_result=None, preload_ocr=True, processor_options=None):
+    """
+    Chạy pipeline cho nhiều tài liệu song song bằng process pool.
+
+    Args:
+        input_files (list): Danh sách file đầu vào
+        workers (int): Số tiến trình worker
+        use_gpu (bool): Dùng GPU cho EasyOCR
+        artifact_dir (str, optional): Thư mục gốc ghi file trung gian của từng tài liệu
+        cache_config (dict, optional): Tham số StageCache (cache_dir, max_bytes)
+            cho mỗi worker; None để tắt cache
+        on_result (callable, optional): Gọi với summary của mỗi tài liệu ngay khi xong
+            (vd ghi JobManifest)
+        preload_ocr (bool): Nạp EasyOCR reader ở tiến trình cha rồi fork worker, để các
+            worker dùng chung trọng số mô hình (copy-on-write) thay vì mỗi worker tự nạp
+        processor_options (dict, optional): Tham số DocumentPreprocessor của mỗi worker
+
+    Returns:
+        list: Trạng thái từng file (xem DocumentContext.summary)
+    """
+    workers = max(1, min(workers, len(input_files)))
+    print_banner(f"BATCH MODE: {len(input_files)} files, {workers} workers")
+
+    mp_context = None
+    # Chỉ fork được khi OCR chạy CPU (CUDA không dùng lại được sau fork)
+    if preload_ocr and not use_gpu and "fork" in multiprocessing.get_all_start_methods():
+        print("Preloading EasyOCR reader before starting workers...")
+        if preload_reader(gpu=use_gpu):
+            mp_context = multiprocessing.get_context("fork")
+
+    results = []
+
+    def record(item):
+        results.append(item)
+        print_progress(item, len(results), len(input_files))
+        if on_result:
+            try:
+                on_result(item)
+            except Exception as e:
+                print(f"Warning: Cannot report result for {item['file']}: {e}")
+
+    def failed(input_file, e):
+        return DocumentContext(input_file).finish("failed", f"Worker: {type(e).__name__}: {e}").summary()
+
+    start = time.perf_counter()
+    pending, isolate = list(input_files), False
+    while pending:
+        # Worker chết (segfault, OOM kill...) làm hỏng cả pool: mọi tài liệu chưa xong
+        # nhận BrokenProcessPool và được chạy lại trong pool mới. Nếu cả lượt không xong
+        # tài liệu nào, mỗi tài liệu còn lại chạy trong pool riêng để chỉ tài liệu làm
+        # worker chết bị ghi failed
+        groups = [[f] for f in pending] if isolate else [pending]
+        broken = []
+        for group in groups:
+            with ProcessPoolExecutor(max_workers=min(workers, len(group)), mp_context=mp_context,
+                                     initializer=_init_worker,
+                                     initargs=(use_gpu, cache_config, processor_options)) as pool:
+                futures = {pool.submit(_process_in_worker, f, artifact_dir): f for f in group}
+                for future in as_completed(futures):
+                    try:
+                        item = future.result()
+                    except BrokenProcessPool as e:
+                        if not isolate:
+                            broken.append(futures[future])
+                            continue
+                        item = failed(futures[future], e)
+                    except Exception as e:
+                        item = failed(futures[future], e)
+                    record(item)
+        if not broken:
+            break
+        isolate = len(broken) == len(pending)
+        print(f"Worker process died, retrying {len(broken)} unfinished documents in "
+              f"{'one pool per document' if isolate else 'a new pool'}...")
+        pending = sorted(broken, key=input_files.index)
+    elapsed = time.perf_counter() - start
+
+    print_batch_summary(results, elapsed)
+    return results
+
+
+def print_progress(item, done, total):
+    suffix = f" ({item['error']})" if item["error"] else ""
+    print(f"[{done}/{total}] {item['status'].upper():<6} {item['file']} - {item['seconds']:.1f}s{suffix}")
+
+
+def write_metrics(results, jsonl_path=None, prom_path=None):
+    """Ghi bản ghi metrics từng tài liệu (JSONL) và bản tổng hợp dạng Prometheus."""
+    records = [r["metrics"] for r in results if r.get("metrics")]
+    if jsonl_path:
+        write_jsonl(records, jsonl_path)
+        print(f"Metrics appended to: {jsonl_path}")
+    if prom_path:
+        with open(prom_path, "w", encoding="utf-8") as f:
+            f.write(to_prometheus(records, [r["status"] for r in results]))
+        print(f"Metrics summary saved to: {prom_path}")
+
+
+def print_batch_summary(results, elapsed):
+    ok = sum(1 for r in results if r["status"] == "ok")
+    print_banner("BATCH SUMMARY")
+    for r in sorted(results, key=lambda r: r["file"]):
+        print(f"{r['status'].upper():<6} {r['seconds']:>7.1f}s  {r['file']}")
+    print(f"\nSucceeded: {ok}/{len(results)}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(results) / elapsed * 60:.2f} documents/minute")
+
+
+# -------- Staged mode --------
+# Module 1 (OCR, CPU), Module 2 (NLP, CPU) và Module 3 (Gemini, network) chạy
+# trên các thread riêng, nối với nhau bằng queue có giới hạn. Tài liệu N+1 được
+# OCR trong khi tài liệu N đang chờ LLM; khi queue đầy, stage phía trước bị
+# chặn lại (backpressure) nên bộ nhớ không phình theo số lượng tài liệu.
+_STAGE_DONE = None
+
+
+def _stage_ocr(processor, analyzer, input_files, out_queue, artifact_dir, cache, report):
+    # Sentinel luôn được gửi (kể cả khi thread dừng vì lỗi) để các stage sau không chờ mãi
+    try:
+        for input_file in input_files:
+            ctx = None
+            try:
+                ctx = DocumentContext(input_file, artifact_dir=artifact_dir)
+                ctx.cache_keys = cache_keys(cache, input_file, processor, analyzer)
+                stage_preprocess(ctx, processor, cache)
+            except Exception as e:
+                report((ctx or DocumentContext(input_file)).finish("failed", f"Module 1: {e}"))
+                continue
+            out_queue.put(ctx)
+    finally:
+        out_queue.put(_STAGE_DONE)
+
+
+def _stage_nlp(analyzer, in_queue, out_queue, cache):
+    try:
+        while True:
+            ctx = in_queue.get()
+            if ctx is _STAGE_DONE:
+                break
+            try:
+                stage_analyze(ctx, analyzer, cache)
+            except Exception as e:
+                # Giống chế độ tuần tự: Module 3 vẫn chạy trên raw text
+                print(f"Error in Module 2 ({ctx.input_file}): {e}")
+            out_queue.put(ctx)
+    finally:
+        out_queue.put(_STAGE_DONE)
+
+
+def _stage_llm(in_queue, cache, report):
+    while True:
+        ctx = in_queue.get()
+        if ctx is _STAGE_DONE:
+            # Trả sentinel lại cho các LLM thread khác cùng dừng
+            in_queue.put(_STAGE_DONE)
+            break
+        try:
+            stage_extract(ctx, cache)
+            if not ctx.extraction:
+                ctx.finish("failed", "Module 3 failed to generate result")
+            else:
+                stage_finalize(ctx, cache, unique_output=True)
+                ctx.finish("ok")
+        except Exception as e:
+            ctx.finish("failed", f"Module 3-5: {e}")
+        report(ctx)
+
+
+def run_staged(input_files, processor, analyzer, queue_depth=2, llm_workers=1,
+               artifact_dir=None, cache=None, on_result=None):
+    """
+    Chạy pipeline cho nhiều tài liệu với các stage chồng lấn nhau.
+
+    Args:
+        input_files (list): Danh sách file đầu vào
+        processor: DocumentPreprocessor đã khởi tạo (dùng bởi stage OCR)
+        analyzer: DocumentAnalyzer đã khởi tạo (dùng bởi stage NLP)
+        queue_depth (int): Số tài liệu tối đa chờ giữa hai stage liên tiếp
+        llm_workers (int): Số thread gọi Gemini song song
+        artifact_dir (str, optional): Thư mục gốc ghi file trung gian của từng tài liệu
+        cache (StageCache, optional): Cache kết quả từng stage
+        on_result (callable, optional): Gọi với summary của mỗi tài liệu ngay khi xong
+
+    Returns:
+        list: Trạng thái từng file (xem DocumentContext.summary)
+    """
+    queue_depth = max(1, queue_depth)
+    print_banner(f"STAGED MODE: {len(input_files)} files, queue depth {queue_depth}, "
+                 f"{llm_workers} LLM workers")
+
+    results = []
+    lock = threading.Lock()
+
+    def report(ctx):
+        # Lỗi khi báo kết quả (vd on_result ghi manifest) chỉ được in ra, không làm
+        # dừng thread của stage
+        with lock:
+            try:
+                results.append(ctx.summary())
+                print_progress(results[-1], len(results), len(input_files))
+                if on_result:
+                    on_result(results[-1])
+            except Exception as e:
+                print(f"Warning: Cannot report result for {ctx.input_file}: {e}")
+
+    nlp_queue = queue.Queue(maxsize=queue_depth)
+    llm_queue = queue.Queue(maxsize=queue_depth)
+    threads = [
+        threading.Thread(target=_stage_ocr, name="stage-ocr",
+                         args=(processor, analyzer, input_files, nlp_queue, artifact_dir, cache, report)),
+        threading.Thread(target=_stage_nlp, name="stage-nlp",
+                         args=(analyzer, nlp_queue, llm_queue, cache)),
+    ]
+    for i in range(max(1, llm_workers)):
+        threads.append(threading.Thread(target=_stage_llm, name=f"stage-llm-{i}",
+                                        args=(llm_queue, cache, report)))
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print_batch_summary(results, elapsed)
+    return results
+
+
+def add_processor_args(parser):
+    """
+    Thêm các tham số của DocumentPreprocessor, Module 2 và cache vào parser; dùng chung
+    cho pipeline.py và service.py, đọc lại bằng processor_options(args).
+    """
+    parser.add_argument("--ocr-workers", type=int, default=1,
+                        help="Số tiến trình OCR song song theo trang cho PDF quét (file đơn, --staged, service.py)")
+    parser.add_argument("--ocr-render", choices=list(RENDER_PRESETS), default="native",
+                        help="Cách render trang trước khi OCR (native = ảnh gốc / 300 dpi màu)")
+    parser.add_argument("--ocr-batch-size", type=int, metavar="N",
+                        help="Nhận dạng vùng chữ của nhiều trang theo batch N (chế độ native)")
+    parser.add_argument("--ocr-scope", choices=list(OCR_SCOPES), default="full",
+                        help="fields: PDF quét chỉ OCR vùng đầu trang 1 và khối chữ ký trang cuối, "
+                             "OCR lại cả tài liệu nếu kết quả không hợp lệ")
+    parser.add_argument("--ocr-sample-pages", type=int, default=0, metavar="N",
+                        help="Chế độ --ocr-scope fields: OCR thêm N trang giữa (cách đều)")
+    parser.add_argument("--stream-pages", action="store_true",
+                        help="Module 1 đọc, làm sạch và tách câu từng trang (PDF rất dài, giới hạn RAM)")
+    parser.add_argument("--segmenter", choices=list(SEGMENTERS), default="underthesea",
+                        help="Tách câu bằng underthesea hoặc theo quy tắc văn bản hành chính (rules, nhanh hơn)")
+    parser.add_argument("--analysis-profile", choices=list(ANALYSIS_PROFILES), default="full",
+                        help="Module 2: full = POS, NER, cú pháp phụ thuộc; fields = chỉ POS và NER (không nạp parser)")
+    parser.add_argument("--no-cache", action="store_true", help="Tắt cache kết quả từng stage và cache OCR")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Thư mục cache kết quả từng stage")
+    parser.add_argument("--cache-size-mb", type=int, default=1024, help="Dung lượng tối đa của cache (MB)")
+    parser.add_argument("--ocr-cache-dir", default=DEFAULT_OCR_CACHE_DIR,
+                        help="Thư mục cache kết quả OCR theo từng ảnh (tắt cùng --no-cache)")
+    parser.add_argument("--ocr-cache-size-mb", type=int, default=256, help="Dung lượng tối đa của cache OCR (MB)")
+
+
+def processor_options(args):
+    """
+    Tham số DocumentPreprocessor (và profile phân tích Module 2) lấy từ dòng lệnh,
+    truyền cho load_models (dùng chung cho mọi chế độ chạy).
+    """
+    return {
+        "analysis_profile": args.analysis_profile,
+        "ocr_render": args.ocr_render,
+        "ocr_batch_size": args.ocr_batch_size,
+        "stream_pages": args.stream_pages,
+        "segmenter": args.segmenter,
+        "ocr_scope": args.ocr_scope,
+        "ocr_sample_pages": args.ocr_sample_pages,
+        "ocr_cache_dir": None if args.no_cache else args.ocr_cache_dir,
+        "ocr_cache_bytes": args.ocr_cache_size_mb * 1024 * 1024,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI_HCMUT_PROJECT document extraction pipeline")
+    parser.add_argument("input_file", nargs="?", help="File cần xử lý (bỏ trống để chọn từ menu)")
+    parser.add_argument("--batch", metavar="DIR_OR_GLOB",
+                        help="Xử lý toàn bộ file trong thư mục hoặc khớp glob pattern")
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Số tiến trình worker cho chế độ batch")
+    parser.add_argument("--staged", action="store_true",
+                        help="Chạy batch trong một tiến trình với các stage OCR/NLP/LLM chồng lấn")
+    parser.add_argument("--queue-depth", type=int, default=2,
+                        help="Số tài liệu tối đa chờ giữa hai stage (chế độ --staged)")
+    parser.add_argument("--llm-workers", type=int, default=1,
+                        help="Số thread gọi Gemini song song (chế độ --staged)")
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR")
+    parser.add_argument("--preload-ocr", action=argparse.BooleanOptionalAction, default=True,
+                        help="Batch: nạp EasyOCR trước khi fork để các worker dùng chung mô hình")
+    add_processor_args(parser)
+    parser.add_argument("--startup-budget", type=float, default=10.0,
+                        help="Cảnh báo nếu thời gian khởi động (import + load model) vượt quá số giây này")
+    parser.add_argument("--save-artifacts", metavar="DIR",
+                        help="Ghi file trung gian (văn bản, JSON Module 2-4) vào DIR/<doc_id>/")
+    parser.add_argument("--metrics-out", metavar="FILE",
+                        help="Ghi thêm bản ghi JSON thời gian/CPU/RSS của từng tài liệu vào FILE (JSONL)")
+    parser.add_argument("--metrics-prom", metavar="FILE",
+                        help="Ghi bản tổng hợp metrics dạng Prometheus text vào FILE")
+    parser.add_argument("--manifest", metavar="FILE",
+                        help="File manifest SQLite của batch; chạy lại với cùng FILE để tiếp tục job bị dừng")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache_config = None
+    if not args.no_cache:
+        cache_config = {"cache_dir": args.cache_dir, "max_bytes": args.cache_size_mb * 1024 * 1024}
+
+    if args.batch:
+        input_files = collect_batch_inputs(args.batch)
+        if not input_files:
+            print(f"No input files matched: {args.batch}")
+            return
+
+        manifest = None
+        on_result = None
+        if args.manifest:
+            manifest = JobManifest(args.manifest)
+            manifest.register(input_files)
+            remaining = manifest.pending(input_files)
+            print(f"Manifest {args.manifest}: {len(input_files) - len(remaining)} done, "
+                  f"{len(remaining)} remaining")
+            input_files = remaining
+            on_result = manifest.record
+            if cache_config is None:
+                # Cần cache để bỏ qua các stage đã xong khi chạy tiếp
+                cache_config = {"cache_dir": args.manifest + ".cache",
+                                "max_bytes": args.cache_size_mb * 1024 * 1024}
+            if not input_files:
+                print("Nothing left to do.")
+                return
+
+        if args.staged:
+            processor, analyzer = load_models(use_gpu=args.gpu, ocr_workers=args.ocr_workers,
+                                              **processor_options(args))
+            startup_report(args.startup_budget)
+            cache = StageCache(**cache_config) if cache_config else None
+            results = run_staged(input_files, processor, analyzer,
+                                 queue_depth=args.queue_depth, llm_workers=args.llm_workers,
+                                 artifact_dir=args.save_artifacts, cache=cache, on_result=on_result)
+        else:
+            results = run_batch(input_files, workers=args.workers, use_gpu=args.gpu,
+                                artifact_dir=args.save_artifacts, cache_config=cache_config,
+                                on_result=on_result, preload_ocr=args.preload_ocr,
+                                processor_options=processor_options(args))
+        write_metrics(results, args.metrics_out, args.metrics_prom)
+        if manifest:
+            print(f"Manifest status: {manifest.counts()}")
+            manifest.close()
+        return
+
+    # 1. Select File
+    if args.input_file:
+        input_file = args.input_file
+        if not os.path.exists(input_file):
+            print(f"File not found: {input_file}")
+            return
+    else:
+        input_file = select_test_file()
     
-    export_result(final_result, input_file)
+    if not input_file:
+        print("Exiting.")
+        return
+
+    print(f"\nSelected file: {input_file}")
+
+    processor, analyzer = load_models(use_gpu=args.gpu, ocr_workers=args.ocr_workers,
+                                      **processor_options(args)) # Pass --gpu if available
+    startup_report(args.startup_budget)
+    cache = StageCache(**cache_config) if cache_config else None
+    ctx = process_document(input_file, processor, analyzer, artifact_dir=args.save_artifacts, cache=cache)
+    # Sau khi xử lý: cho biết tài liệu này có phải khởi tạo EasyOCR/torch hay không
+    startup_report()
+    write_metrics([ctx.summary()], args.metrics_out, args.metrics_prom)
 
 if __name__ == "__main__":
     main()
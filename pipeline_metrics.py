@@ -0,0 +1,191 @@
+"""
+Đo thời gian và tài nguyên cho từng stage của pipeline.
+
+Cách dùng:
+    doc_metrics = DocumentMetrics("test_1")
+    with recording(doc_metrics):
+        with timed("module_1"):
+            ...
+            with timed("ocr_page"):   # ghi thành "module_1.ocr_page"
+                ...
+
+Các module chỉ cần gọi timed(name); khi không có DocumentMetrics nào đang ghi
+trên thread hiện tại thì timed() không làm gì cả.
+
+Mỗi lần đo ghi lại:
+- wall_s: thời gian thực
+- cpu_s: CPU time của cả tiến trình (bao gồm thread nội bộ của torch/spaCy;
+  ở chế độ --staged các stage chạy chồng lấn nên số này gồm cả stage khác)
+- rss_delta_mb: RSS hiện tại lúc kết thúc trừ lúc bắt đầu bước (bộ nhớ bước đó giữ
+  lại; cộng dồn qua các lần chạy, có thể âm; ở chế độ --staged gồm cả stage khác)
+- rss_end_mb: RSS hiện tại lúc kết thúc lần chạy gần nhất
+
+Bản ghi tài liệu có thêm rss_mb (RSS hiện tại khi kết thúc tài liệu) và
+process_peak_rss_mb: RSS cao nhất của tiến trình từ khi khởi động (ru_maxrss). Trong
+worker batch số này chỉ tăng dần qua các tài liệu, không phải đỉnh của từng tài liệu.
+"""
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_local = threading.local()
+
+
+def current_rss_mb():
+    """RSS hiện tại của tiến trình (MB, đọc /proc/self/statm), None nếu không có /proc."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def peak_rss_mb():
+    """
+    RSS cao nhất của tiến trình từ khi khởi động (MB), None nếu hệ điều hành không hỗ
+    trợ.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class DocumentMetrics:
+    """
+    Số liệu đo của một tài liệu, tổng hợp theo tên bước (vd "module_1.ocr_page").
+    """
+
+    def __init__(self, doc_id, file_name=None):
+        self.doc_id = doc_id
+        self.file_name = file_name
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, wall_s, cpu_s, rss_start_mb, rss_end_mb):
+        with self._lock:
+            step = self.steps.setdefault(name, {
+                "count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+                "rss_delta_mb": None, "rss_end_mb": None,
+            })
+            step["count"] += 1
+            step["wall_s"] += wall_s
+            step["cpu_s"] += cpu_s
+            step["max_wall_s"] = max(step["max_wall_s"], wall_s)
+            if rss_start_mb is not None and rss_end_mb is not None:
+                step["rss_delta_mb"] = (step["rss_delta_mb"] or 0.0) + rss_end_mb - rss_start_mb
+                step["rss_end_mb"] = rss_end_mb
+
+    def to_dict(self):
+        """Bản ghi JSON của tài liệu."""
+        with self._lock:
+            steps = {name: dict(values) for name, values in self.steps.items()}
+        return {
+            "doc_id": self.doc_id,
+            "file": self.file_name,
+            "rss_mb": current_rss_mb(),
+            "process_peak_rss_mb": peak_rss_mb(),
+            "steps": steps,
+        }
+
+
+@contextmanager
+def recording(doc_metrics):
+    """Gắn doc_metrics vào thread hiện tại trong phạm vi khối with."""
+    previous = getattr(_local, "metrics", None)
+    previous_stack = getattr(_local, "stack", [])
+    _local.metrics = doc_metrics
+    _local.stack = []
+    try:
+        yield doc_metrics
+    finally:
+        _local.metrics = previous
+        _local.stack = previous_stack
+
+
+@contextmanager
+def timed(name):
+    """Đo một bước; tên được nối với bước cha đang đo (vd "module_2.spacy_pos")."""
+    doc_metrics = getattr(_local, "metrics", None)
+    if doc_metrics is None:
+        yield
+        return
+    _local.stack.append(name)
+    full_name = ".".join(_local.stack)
+    rss_start = current_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        doc_metrics.add(full_name, time.perf_counter() - wall_start,
+                        time.process_time() - cpu_start, rss_start, current_rss_mb())
+        _local.stack.pop()
+
+
+def write_jsonl(records, path):
+    """Ghi thêm bản ghi của từng tài liệu vào file JSONL."""
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def to_prometheus(records, statuses=None):
+    """
+    Tổng hợp bản ghi nhiều tài liệu thành text theo định dạng Prometheus.
+
+    Args:
+        records (list): Các dict từ DocumentMetrics.to_dict()
+        statuses (list, optional): Trạng thái từng tài liệu ("ok"/"failed")
+
+    Returns:
+        str: Nội dung exposition format
+    """
+    totals = {}
+    peak = 0.0
+    for record in records:
+        peak = max(peak, record.get("process_peak_rss_mb") or 0.0)
+        for name, step in record["steps"].items():
+            total = totals.setdefault(name, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0})
+            total["count"] += step["count"]
+            total["wall_s"] += step["wall_s"]
+            total["cpu_s"] += step["cpu_s"]
+            total["max_wall_s"] = max(total["max_wall_s"], step["max_wall_s"])
+
+    metrics = [
+        ("pipeline_step_calls_total", "counter", "Number of times a step ran", "count"),
+        ("pipeline_step_wall_seconds_total", "counter", "Wall time spent in a step", "wall_s"),
+        ("pipeline_step_cpu_seconds_total", "counter", "Process CPU time spent in a step", "cpu_s"),
+        ("pipeline_step_wall_seconds_max", "gauge", "Slowest single run of a step", "max_wall_s"),
+    ]
+    lines = []
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name in sorted(totals):
+            lines.append(f'{metric}{{step="{name}"}} {totals[name][field]:.6g}')
+
+    lines.append("# HELP pipeline_documents_total Documents processed")
+    lines.append("# TYPE pipeline_documents_total counter")
+    if statuses is None:
+        lines.append(f"pipeline_documents_total {len(records)}")
+    else:
+        for status in sorted(set(statuses)):
+            lines.append(f'pipeline_documents_total{{status="{status}"}} {statuses.count(status)}')
+
+    lines.append("# HELP pipeline_peak_rss_bytes Highest process peak RSS (ru_maxrss) seen by any document")
+    lines.append("# TYPE pipeline_peak_rss_bytes gauge")
+    lines.append(f"pipeline_peak_rss_bytes {peak * 1024 * 1024:.0f}")
+    return "\n".join(lines) + "\n"
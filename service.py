@@ -0,0 +1,185 @@
+"""
+Dịch vụ trích xuất chạy thường trú trên localhost.
+
+Mô hình (EasyOCR, spaCy, underthesea, Gemini client) được nạp MỘT lần khi khởi
+động, nên mỗi request chỉ tốn thời gian xử lý tài liệu.
+
+Chạy:
+    python service.py --port 8765
+
+Gửi tài liệu:
+    curl -X POST --data-binary @test/test_2.pdf "http://127.0.0.1:8765/extract?filename=test_2.pdf"
+    curl -X POST -H "Content-Type: application/json" -d '{"path": "test/test_2.pdf"}' http://127.0.0.1:8765/extract
+    curl http://127.0.0.1:8765/health
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pipeline
+from stage_cache import StageCache
+from Module_5.exporter import format_output
+
+# Câu mẫu để nạp trước mô hình underthesea/spaCy (lần gọi đầu tiên mới load model)
+WARM_UP_TEXT = "Bộ Giáo dục và Đào tạo. Hà Nội, ngày 14 tháng 10 năm 2025. Quyết định số 2827/qđ-bgdđt."
+
+
+class ExtractionService:
+    """
+    Giữ các mô hình đã nạp và xử lý từng tài liệu qua pipeline.
+
+    Các mô hình không an toàn khi dùng đồng thời, nên mỗi lúc chỉ xử lý một tài liệu
+    (các request khác chờ lock; /health vẫn trả lời ngay).
+    """
+
+    def __init__(self, use_gpu=False, cache=None, artifact_dir=None, processor_options=None):
+        """
+        Args:
+            use_gpu (bool): Dùng GPU cho EasyOCR
+            cache (StageCache, optional): Cache kết quả từng stage
+            artifact_dir (str, optional): Thư mục ghi file trung gian
+            processor_options (dict, optional): Tham số load_models (ocr_workers, ocr_render, analysis_profile...)
+        """
+        start = time.perf_counter()
+        self.processor, self.analyzer = pipeline.load_models(use_gpu=use_gpu, **(processor_options or {}))
+        self.cache = cache
+        self.artifact_dir = artifact_dir
+        self._lock = threading.Lock()
+        self.documents_processed = 0
+        self.warm_up()
+        self.startup_seconds = time.perf_counter() - start
+        print(f"Service ready after {self.startup_seconds:.1f}s")
+
+    def warm_up(self):
+        """Nạp trước các mô hình khởi tạo lười (EasyOCR, underthesea, Gemini client)."""
+        print("Warming up models...")
+        try:
+            self.processor.preload_ocr()
+            self.processor.raw_text = WARM_UP_TEXT
+            self.processor.clean().segment()
+            self.analyzer.analyze_ner(WARM_UP_TEXT)
+        except Exception as e:
+            print(f"Warning: Warm-up failed: {e}")
+        try:
+            pipeline.get_client()
+        except Exception as e:
+            print(f"Warning: Cannot create Gemini client: {e}")
+
+    def process(self, input_file):
+        """
+        Chạy Module 1 -> 5 cho một file.
+
+        Returns:
+            dict: Trạng thái, kết quả Module 4 và nội dung xuất của Module 5
+        """
+        with self._lock:
+            ctx = pipeline.process_document(input_file, self.processor, self.analyzer,
+                                            artifact_dir=self.artifact_dir, cache=self.cache)
+            self.documents_processed += 1
+        response = ctx.summary()
+        response["result"] = ctx.result
+        response["formatted"] = format_output(ctx.result) if ctx.result else None
+        return response
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "startup_seconds": self.service.startup_seconds,
+            "documents_processed": self.service.documents_processed,
+        })
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/extract":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        content_type = self.headers.get("Content-Type", "")
+
+        # JSON {"path": "..."}: xử lý file có sẵn trên máy
+        if content_type.startswith("application/json"):
+            try:
+                path = json.loads(body.decode("utf-8")).get("path")
+            except (ValueError, AttributeError):
+                path = None
+            if not path or not os.path.isfile(path):
+                self._send_json(400, {"error": f"file not found: {path}"})
+                return
+            self._send_json(200, self.service.process(path))
+            return
+
+        # Nội dung file gửi trực tiếp: cần tên file để biết định dạng
+        filename = os.path.basename(parse_qs(url.query).get("filename", [""])[0]
+                                    or self.headers.get("X-Filename", ""))
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in pipeline.VALID_EXTENSIONS or not body:
+            self._send_json(400, {"error": "missing document body or unsupported filename",
+                                  "supported": pipeline.VALID_EXTENSIONS})
+            return
+
+        tmp_dir = tempfile.mkdtemp(prefix="extract-")
+        try:
+            input_file = os.path.join(tmp_dir, filename)
+            with open(input_file, "wb") as f:
+                f.write(body)
+            self._send_json(200, self.service.process(input_file))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def serve(service, host="127.0.0.1", port=8765):
+    """Chạy HTTP server cho tới khi bị dừng (Ctrl+C)."""
+    handler = type("RequestHandler", (_RequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Listening on http://{host}:{port} (POST /extract, GET /health)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping service.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident document extraction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--gpu", action="store_true", help="Dùng GPU cho EasyOCR")
+    parser.add_argument("--save-artifacts", metavar="DIR", help="Ghi file trung gian vào DIR/<doc_id>/")
+    pipeline.add_processor_args(parser)
+    args = parser.parse_args()
+
+    cache = None
+    if not args.no_cache:
+        cache = StageCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+    service = ExtractionService(use_gpu=args.gpu, cache=cache, artifact_dir=args.save_artifacts,
+                                processor_options={"ocr_workers": args.ocr_workers,
+                                                   **pipeline.processor_options(args)})
+    serve(service, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
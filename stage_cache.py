@@ -0,0 +1,165 @@
+"""
+Cache kết quả từng stage của pipeline trên đĩa (content-addressed).
+
+Khóa của mỗi stage = hash(tên stage + khóa stage phía trước + cấu hình + phiên bản code):
+- module_1: hash nội dung file đầu vào
+- module_2, module_3: khóa module_1 (cùng văn bản đầu vào)
+- module_4: khóa module_3 (cùng kết quả LLM)
+
+Phiên bản code là hash các file nguồn và file dữ liệu (bảng sửa lỗi, patterns) của
+stage, nên khi sửa Module_4/rules.py chỉ khóa module_4 thay đổi và Module 1-3 được
+lấy lại từ cache; sửa nội dung một file JSON cũng đủ làm mới cache, không cần tăng version.
+Dung lượng cache bị giới hạn, các mục ít dùng nhất (LRU theo mtime) bị xóa trước.
+"""
+import os
+import glob
+import json
+import hashlib
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# File nguồn quyết định kết quả của từng stage
+STAGE_SOURCES = {
+    "module_1": ["Module_1/*.py", "Module_1/ocr_corrections.json"],
+    "module_2": ["Module_2/*.py", "Module_2/corrections.json", "Module_2/ner_patterns.json"],
+    "module_3": ["Module_3/*.py"],
+    "module_4": ["Module_4/*.py"],
+}
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "pipeline")
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Tính SHA-256 nội dung file."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def code_version(stage):
+    """Hash toàn bộ file nguồn của một stage (xem STAGE_SOURCES)."""
+    h = hashlib.sha256()
+    for pattern in STAGE_SOURCES.get(stage, []):
+        for path in sorted(glob.glob(os.path.join(ROOT_DIR, pattern))):
+            h.update(os.path.relpath(path, ROOT_DIR).encode("utf-8"))
+            with open(path, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+class StageCache:
+    """
+    Cache JSON trên đĩa cho kết quả Module 1-4, giới hạn dung lượng với LRU.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir (str): Thư mục lưu cache
+            max_bytes (int): Dung lượng tối đa; vượt quá thì xóa mục cũ nhất
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._code_versions = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def stage_key(self, stage, parent_key, config=None):
+        """Tạo khóa cho một stage từ khóa stage trước, cấu hình và phiên bản code."""
+        if stage not in self._code_versions:
+            self._code_versions[stage] = code_version(stage)
+        payload = json.dumps(
+            [stage, parent_key, config or {}, self._code_versions[stage]],
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def document_keys(self, input_file, configs=None):
+        """
+        Tính khóa của cả 4 stage cho một tài liệu.
+
+        Args:
+            input_file (str): Đường dẫn file đầu vào
+            configs (dict, optional): Cấu hình riêng từng stage, vd {"module_2": {"model": ...}}
+
+        Returns:
+            dict: {stage: key}
+        """
+        configs = configs or {}
+        keys = {}
+        keys["module_1"] = self.stage_key("module_1", hash_file(input_file), configs.get("module_1"))
+        keys["module_2"] = self.stage_key("module_2", keys["module_1"], configs.get("module_2"))
+        keys["module_3"] = self.stage_key("module_3", keys["module_1"], configs.get("module_3"))
+        keys["module_4"] = self.stage_key("module_4", keys["module_3"], configs.get("module_4"))
+        return keys
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.json")
+
+    def get(self, stage, key):
+        """Lấy kết quả đã cache, trả về None nếu không có."""
+        path = self._path(stage, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)["value"]
+            # Cập nhật mtime để đánh dấu vừa được dùng (LRU)
+            os.utime(path, None)
+            return value
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def put(self, stage, key, value):
+        """Ghi kết quả vào cache (ghi file tạm rồi rename để an toàn khi nhiều tiến trình)."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"stage": stage, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(stage, key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def cached_stage(cache, stage, keys, compute):
+    """
+    Chạy compute() nếu chưa có kết quả trong cache, ngược lại trả về kết quả đã lưu.
+    Kết quả rỗng/None (stage thất bại) không được cache.
+    """
+    if cache is None or keys is None:
+        return compute()
+    value = cache.get(stage, keys[stage])
+    if value is not None:
+        print(f"Cache hit: {stage}")
+        return value
+    value = compute()
+    if value:
+        cache.put(stage, keys[stage], value)
+    return value